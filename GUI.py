@@ -82,9 +82,9 @@ def main():
         # [sg.Text("Combinational Circuit Simplifier", justification='left')],
         [sg.Text('Please enter minterms and don\'t cares (if any)')],
         [sg.Text("Minterms: ", justification='left'), sg.InputText("",size=(40,4),key="-MINTERMS-")],
-        [sg.Text('                      Values: 0-1023')],
+        [sg.Text('                      Values: 0-1048575')],
         [sg.Text("Don't \nCares:      ", justification='left'), sg.InputText("",size=(40,4),key="-DCS-")],
-        [sg.Text('                      Values: 0-1023')],
+        [sg.Text('                      Values: 0-1048575')],
         [sg.Button('Run'), sg.Button('Exit')],
         [sg.Text("Input must be comma seperated", justification='left')],
         [sg.Text("Example: 1,2,3,4,5", justification='left')]
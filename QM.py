@@ -7,13 +7,448 @@
 
 
 import numpy as np
-import math
+import argparse
+import collections
+import contextlib
+import functools
+import itertools
+import hashlib
+import heapq
+import json
+import multiprocessing
+import multiprocessing.resource_tracker
+import multiprocessing.shared_memory
+import os
+import sqlite3
+import string
+import sys
+import time
+import tracemalloc
+
+# QMTooLargeError
+# raised when the exact method would use more memory than the budget given to QMClass
+class QMTooLargeError(ValueError):
+    pass
+
+
+# QMResult
+# holds the result of minimizing one function, without any formatting for the console
+# solution, closeCover: the SOP essential terms and close cover options, as returned by qmMethod
+# sop: the SOP equations, one per close cover option
+# cost: the number of literals of the first SOP option
+# pos, posSolution, posCloseCover, posIsMinimal: the same for the POS form, None if it wasn't requested
+# posClauses: the POS form as sum terms, one list of sum terms (each a list of literals) per option
+# posCost, best: the number of literals of the first POS option, and the cheaper form ("SOP" or "POS")
+# stats, posStats: the QMStats of each form as dictionaries, None if stats are not enabled
+class QMResult:
 
-class QMClass:
+    # constructor
+    def __init__(self, input, numVariables, solution, closeCover, sop, cost, isMinimal):
+        self.input = input
+        self.numVariables = numVariables
+        self.solution = solution
+        self.closeCover = closeCover
+        self.sop = sop
+        self.cost = cost
+        self.isMinimal = isMinimal
+        self.pos = None
+        self.posSolution = None
+        self.posCloseCover = None
+        self.posIsMinimal = None
+        self.posClauses = None
+        self.posCost = None
+        self.best = None
+        self.stats = None
+        self.posStats = None
+
+
+    # toDict(self)
+    # converts the result into a dictionary, e.g. for JSON output
+    # Arguments: None
+    # returns: a dictionary of the result fields
+    def toDict(self):
+        return dict(vars(self))
+
+
+# QMStats
+# records where one minimization spends its time: the wall time of each phase, in seconds, and counters such as
+# the number of cubes per level, the number of prime implicants, the size of the PI chart and cyclic core, and
+# the number of products in Petrick's method. If tracemalloc is tracing, the peak memory of each phase (in bytes
+# above the memory in use when the phase started) is recorded as well.
+class QMStats:
 
     # constructor
     def __init__(self):
-        self.varLetters = ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J"]
+        self.clear()
+
+
+    # clear(self)
+    # removes all times and counters
+    # Arguments: None
+    # returns: None
+    def clear(self):
+        self.times = {}
+        self.counters = {}
+        self.memory = {}
+        self.openPhases = []
+
+
+    # timer(self, phase)
+    # measures the wall time of a block of code, and adds it to the time of a phase
+    # Arguments: the name of the phase
+    # returns: a context manager, used as "with stats.timer(phase):"
+    @contextlib.contextmanager
+    def timer(self, phase):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # the peak is reset for this phase, so the phases it is nested in keep the peak so far
+            current, peak = tracemalloc.get_traced_memory()
+            for outer in self.openPhases:
+                outer[1] = max(outer[1], peak)
+            tracemalloc.reset_peak()
+            self.openPhases.append([current, current])
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[phase] = self.times.get(phase, 0.0) + time.perf_counter() - start
+
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                for outer in self.openPhases:
+                    outer[1] = max(outer[1], peak)
+                current, peak = self.openPhases.pop()
+                self.memory[phase] = max(self.memory.get(phase, 0), peak - current)
+
+
+    # set(self, name, value)
+    # Arguments: the name of a counter, and its value
+    # returns: None
+    def set(self, name, value):
+        self.counters[name] = value
+
+
+    # add(self, name, value)
+    # Arguments: the name of a counter, and the amount to add to it
+    # returns: None
+    def add(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+    # toDict(self)
+    # Arguments: None
+    # returns: a dictionary with the times, counters and (if it was traced) memory
+    def toDict(self):
+        result = {"times": dict(self.times), "counters": dict(self.counters)}
+        if self.memory:
+            result["memory"] = dict(self.memory)
+        return result
+
+
+    # toJSON(self)
+    # Arguments: None
+    # returns: the dictionary from toDict as a JSON string
+    def toJSON(self):
+        return json.dumps(self.toDict())
+
+
+# LRUCache
+# a dictionary with a maximum size that drops the least recently used entry when it is full, and counts
+# its hits and misses
+class LRUCache:
+
+    # constructor
+    # Arguments: the maximum number of entries
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    # get(self, key)
+    # looks up a key and marks it as the most recently used
+    # Arguments: a hashable key
+    # returns: the stored value, or None if the key is not in the cache
+    def get(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+
+    # put(self, key, value)
+    # stores a value, evicting the least recently used entry if the cache is full
+    # Arguments: a hashable key, and the value
+    # returns: None
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+
+    # clear(self)
+    # removes all entries and resets the counters
+    # Arguments: None
+    # returns: None
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+    # stats(self)
+    # Arguments: None
+    # returns: a dictionary with the number of entries, hits and misses
+    def stats(self):
+        return {"size": len(self.entries), "maxSize": self.maxSize, "hits": self.hits, "misses": self.misses}
+
+
+# DiskCache
+# a persistent cache of minimized functions in an SQLite file, shared between runs and processes
+class DiskCache:
+
+    # constructor
+    # Arguments: the path of the SQLite file. It is created if it doesn't exist.
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.hits = 0
+        self.misses = 0
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS covers (key TEXT PRIMARY KEY, value TEXT)")
+
+
+    # makeKey(self, numVariables, minterms, dontCares, method)
+    # hashes a function into a key. Duplicates and the order of the terms don't change the key.
+    # Arguments: the number of variables, iterables of minterms and dont cares, and a tuple describing how the
+    # result was found and written (variable names, solver)
+    # returns: the key as a hex string
+    def makeKey(self, numVariables, minterms, dontCares, method):
+        on = sorted(set(minterms))
+        dc = sorted(set(dontCares) - set(on))
+        text = json.dumps([numVariables, on, dc, list(method)])
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+    # get(self, key)
+    # Arguments: a key from makeKey
+    # returns: the stored dictionary, or None if the key is not in the cache
+    def get(self, key):
+        row = self.connection.execute("SELECT value FROM covers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+
+    # put(self, key, value)
+    # Arguments: a key from makeKey, and a dictionary that can be written as JSON
+    # returns: None
+    def put(self, key, value):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO covers VALUES (?, ?)", (key, json.dumps(value)))
+
+
+# caches shared by all QMClass objects of a process, so batch runs reuse the work of repeated functions.
+# primeCache maps a care set (ON and DC terms) to its prime implicants, and coverCache maps a set of
+# prime implicants and minterms to the essential terms and close cover.
+primeCache = LRUCache(256)
+coverCache = LRUCache(1024)
+
+# npnCache maps an NPN class representative (and whether it or its complement was minimized) to its cover, and
+# the truth table of every function minimized through it to its solution
+npnCache = LRUCache(4096)
+
+
+# estimated bytes used by one cube during prime implicant generation, one cell of the PI chart (a bit in the row
+# and column bitsets, and the copies made while it is reduced), and one product in Petrick's method, to turn
+# counts into a memory estimate
+CUBE_BYTES = 150
+CELL_BYTES = 1
+PRODUCT_BYTES = 150
+
+# createChart builds the PI chart this many cells at a time
+CHART_BLOCK = 2**22
+
+# the memory limit is checked every MERGE_STEP cubes while a level of cubes is merged into the next one
+MERGE_STEP = 1024
+
+# levels with fewer cubes than this are merged in one process, even if mergeJobs is set
+PARALLEL_MERGE_MIN = 20000
+
+# the precomputed covers of all 4 variable functions, written by buildTable.py
+TABLE_FILE = "table4.npz"
+
+
+# loadTable()
+# loads the precomputed cover table the first time it is needed
+# Arguments: None
+# Returns: a dictionary with the costs, offsets and data arrays, or None if the table file doesn't exist
+@functools.lru_cache(maxsize=None)
+def loadTable():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), TABLE_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as table:
+        return {name: table[name] for name in ("costs", "offsets", "data")}
+
+
+# subcubeOffsets(mask)
+# lists the terms of a cube relative to its value: every combination of the bits of the mask
+# Arguments: the mask of a cube as an integer
+# Returns: a numpy array of integers
+@functools.lru_cache(maxsize=4096)
+def subcubeOffsets(mask):
+    offsets = np.zeros(1, dtype=np.int64)
+    while mask:
+        bit = mask & -mask
+        offsets = np.concatenate([offsets, offsets | bit])
+        mask &= ~bit
+
+    return offsets
+
+
+# npnTransforms(numVariables)
+# lists every input permutation and input negation of a function of up to 6 variables. Transform t moves
+# minterm x to y: bit i of x, xor bit i of negs[t], goes to bit perms[t][i]. The result is kept for each
+# number of variables.
+# Arguments: the number of variables as an integer
+# Returns: the list of permutations and the array of negations (one entry per transform), and an array
+# whose row t maps every y back to its x
+@functools.lru_cache(maxsize=None)
+def npnTransforms(numVariables):
+    terms = np.arange(2**numVariables)
+    negs = np.arange(2**numVariables)
+    perms = []
+    maps = []
+
+    for perm in itertools.permutations(range(numVariables)):
+        negated = negs[:, None] ^ terms[None, :]
+        moved = np.zeros_like(negated)
+        for i in range(numVariables):
+            moved |= ((negated >> i) & 1) << perm[i]
+
+        perms.extend([perm] * len(negs))
+        maps.append(np.argsort(moved, axis=1).astype(np.uint8))
+
+    return perms, np.tile(negs, len(maps)), np.concatenate(maps)
+
+
+class QMClass:
+
+    # constructor
+    # Arguments: optionally, a list of variable names (most significant bit first). If names are given, the
+    # number of names sets the number of variables of every function. The solver picks the exact method used
+    # for the close cover: "petrick" (all cheapest covers) or "branch" (branch and bound, one cheapest cover).
+    # If a time limit (in seconds) is given and the close cover search runs past it, the best cover found so far
+    # is returned and self.isMinimal is set to False. With heuristic=True, runQM uses espressoMethod instead of
+    # qmMethod. With cache=False, the shared prime implicant and cover caches are not used. If a cache path is
+    # given, minimized functions are also stored in a DiskCache at that path. With npn=True, completely specified
+    # functions of 6 variables are minimized through their NPN class (see npnMethod). With table=False,
+    # functions of up to 4 variables are not looked up in the precomputed table (see tableMethod). With
+    # stats=True, self.stats is a QMStats holding the times and counters of the last minimize call. If a memory
+    # limit (in bytes) is given and the exact method would go over it, minimize falls back to espressoMethod, or
+    # raises QMTooLargeError if onTooLarge is "error". With mergeJobs above 1, large levels of prime implicant
+    # generation are merged in that many processes.
+    def __init__(self, varNames=None, solver="petrick", timeLimit=None, heuristic=False, cache=True,
+                 cachePath=None, npn=False, table=True, stats=False, memoryLimit=None, onTooLarge="espresso",
+                 mergeJobs=1):
+        if solver not in ("petrick", "branch"):
+            raise ValueError("unknown solver: " + str(solver))
+        if onTooLarge not in ("espresso", "error"):
+            raise ValueError("unknown onTooLarge option: " + str(onTooLarge))
+
+        # the constructor arguments, to create the same QMClass in worker processes
+        self.options = {"varNames": varNames, "solver": solver, "timeLimit": timeLimit, "heuristic": heuristic,
+                        "cache": cache, "cachePath": cachePath, "npn": npn, "table": table, "stats": stats,
+                        "memoryLimit": memoryLimit, "onTooLarge": onTooLarge, "mergeJobs": mergeJobs}
+
+        self.solver = solver
+        self.heuristic = heuristic
+        self.timeLimit = timeLimit
+        self.deadline = None
+        self.isMinimal = True
+        self.varNames = list(varNames) if varNames else None
+        self.varLetters = self.getVarNames(len(self.varNames) if self.varNames else 26)
+        self.numVariables = 0
+        self.cyclicCore = (0, 0)
+        self.primeCache = primeCache if cache else None
+        self.coverCache = coverCache if cache else None
+        self.diskCache = DiskCache(cachePath) if cachePath else None
+        self.npn = npn
+        self.table = table
+        self.stats = QMStats() if stats else None
+        self.memoryLimit = memoryLimit
+        self.onTooLarge = onTooLarge
+        self.mergeJobs = mergeJobs
+
+
+    # phase(self, name)
+    # times a phase of the minimization if stats are enabled
+    # Arguments: the name of the phase
+    # returns: a context manager, used as "with self.phase(name):"
+    def phase(self, name):
+        if self.stats is None:
+            return contextlib.nullcontext()
+        return self.stats.timer(name)
+
+
+    # record(self, name, value, add)
+    # sets (or adds to) a counter if stats are enabled
+    # Arguments: the name of the counter, its value, and whether to add the value to the counter
+    # returns: None
+    def record(self, name, value, add=False):
+        if self.stats is None:
+            return
+        if add:
+            self.stats.add(name, value)
+        else:
+            self.stats.set(name, value)
+
+
+    # checkMemory(self, count, itemBytes, step)
+    # checks the estimated memory of a step against the memory limit
+    # Arguments: the number of items the step holds, the estimated bytes per item, and the name of the step
+    # returns: None. Raises QMTooLargeError if the estimate is over the limit.
+    def checkMemory(self, count, itemBytes, step):
+        if self.memoryLimit is not None and count * itemBytes > self.memoryLimit:
+            raise QMTooLargeError("%s needs about %.1f MB, over the %.1f MB memory limit" %
+                                  (step, count * itemBytes / 2**20, self.memoryLimit / 2**20))
+
+
+    # timeUp(self)
+    # checks if the time limit of the current run has passed
+    # Arguments: None
+    # returns: True if there is a time limit and it has passed, False otherwise
+    def timeUp(self):
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+
+    # getVarNames(self, numVariables)
+    # determines the variable names used for the literals of a function
+    # Arguments: the number of variables as an integer
+    # returns: a list of variable names, most significant bit first. Letters A-Z are used for up to 26
+    # variables and x0, x1, ... are used above that, unless names were passed to the constructor.
+    def getVarNames(self, numVariables):
+        if self.varNames:
+            if numVariables > len(self.varNames):
+                raise ValueError("function needs " + str(numVariables) + " variables but only " +
+                                 str(len(self.varNames)) + " names were given")
+            return self.varNames[:numVariables]
+
+        if numVariables <= len(string.ascii_uppercase):
+            return list(string.ascii_uppercase[:max(numVariables, 1)])
+
+        return ["x" + str(i) for i in range(numVariables)]
 
 
     # getNumVars(self, list)
@@ -25,22 +460,33 @@ class QMClass:
         # get max minterm
         maxNum = max(list)
 
+        # named variables fix the number of variables
+        if self.varNames:
+            if maxNum >= 2**len(self.varNames):
+                raise ValueError("minterm " + str(maxNum) + " is out of range for " +
+                                 str(len(self.varNames)) + " variables")
+            return len(self.varNames)
+
         # edge case, only need one bit for a minterm of 0
         if max(list) == 0:
             return 1
         
         # find required num of vars
         else:
-            return math.ceil(math.log2(maxNum+1))
+            return maxNum.bit_length()
 
     
     # createLiterals(self, binString)
     # generates literals to represent a binary string
-    # Arguments: a binary string
+    # Arguments: a binary string, or a (value, mask) cube which is converted using the current number of variables
     # returns: the literals representing the binary string, left to right
     def createLiterals(self,binString):
         literal = ""
 
+        # cubes are only turned into strings at the output boundary
+        if isinstance(binString, tuple):
+            binString = self.cubeToString(binString, self.numVariables)
+
         for i, bit in enumerate(binString):
             # add literal complement if 0
             if(bit == '0'):
@@ -53,108 +499,71 @@ class QMClass:
             
         return literal  
 
-    # compareTerms(self, term1, term2) 
-    # check if the difference between two numbers is one bit only
-    # Arguments: two terms, as binary strings, to compare between. The two terms must have the same length.
-    # Returns: the index of the different bit if there is a single bit difference, otherwise -1.    
-    def compareTerms(self, term1, term2):
-        counter = 0
-        index = -1
-
-        # count number of different bits between two binary strings
-        for i in range(len(term1)):
-            if term1[i] != term2[i]:          
-                counter += 1
-                index = i
-        
-        if counter == 1:
-            return index
-        
-        else:
-            return -1
-        
-
-
-    # combineTerms(self, term1, term2) 
-    # combine two terms that only have 1 bit difference
-    # Arguments: two terms, as binary strings, with the same length.
-    # Returns: the combined result of the two terms if they differ by excatly 1 bit, and 0 otherwise.
-    def combineTerms(self, term1, term2):
-
-        index = self.compareTerms(term1, term2)
-        # if terms don't differ by exactly 1 bit
-        if index == -1:
-            return 0
-        
-        # if terms do differ by 1 bit only
-        else:
-            #replace the bit difference by - and return the new, combined term
-            term1 = list(term1)
-            term1[index] = '-'
-            term1 = "".join(term1)
-            return term1
-
-
-    # combineGroups(self, group1, group2) 
-    # combine two groups of minterms, where each group has the same number of 1s in their binary strings.
-    # Arguments: two groups of terms, as binary strings.
-    # Returns: two lists (combined, checklist), which represent
-    # the combined result of the two groups and a checklist of the terms that were combined successfully.
-    def combineGroups(self, group1, group2):
-        combined = []
-        checklist = []
+    # cubeToString(self, cube, numVariables)
+    # converts a cube into its binary string form, with '-' in the place of eliminated variables
+    # Arguments: a (value, mask) cube of integers, and the number of variables as an integer
+    # returns: the binary string representing the cube, most significant bit first
+    def cubeToString(self, cube, numVariables):
+        value, mask = cube
+        bits = []
+
+        for i in range(numVariables-1, -1, -1):
+            if (mask >> i) & 1:
+                bits.append('-')
+            else:
+                bits.append(str((value >> i) & 1))
 
+        return "".join(bits)
 
-        for x in group1:
-            for y in group2:
-                # combine terms between two groups of terms
-                newCube = self.combineTerms(x, y)
 
-                # if terms cannot be combined
-                if not newCube:
-                    continue
+    # termArray(self, terms)
+    # converts a list of integers (minterms, cube values or masks) into a numpy array
+    # Arguments: a list of integers
+    # Returns: a numpy array of the integers. Python integers are kept when they don't fit in 64 bits.
+    def termArray(self, terms):
+        if self.numVariables < 63:
+            return np.array(terms, dtype=np.int64)
 
-                # add new term to result and combined terms to checklist
-                else: 
-                    combined.append(newCube)
-                    checklist.append(x)
-                    checklist.append(y)
-        
-        return combined, checklist
-        
-        
-        
-    # checkCoverage(self, minterm, implicant) 
-    # checks if a minterm is covered by an implicant
-    # Arguments: two binary strings, a minterm, and an implicant
-    # Returns: True if the minterm is covered by an implicant, false otherwise
-    def checkCoverage(self, minterm, implicant):
-
-        for i in range(len(minterm)):
-            # check if the two bits are the same or the implicant has a don't care in that spot
-            # if not, then minterm is not covered
-            if (minterm[i] != implicant[i]) & (implicant[i] != '-'):
-                return False
-            else: 
-                continue
+        return np.array(terms, dtype=object)
 
-        return True
-            
 
     # createTable(self, PIList, mintermsList) 
     # create a Prime Implicant table
-    # Arguments: two binary string lists: a prime implicant list, and a minterm list.
-    # Returns: a table with boolean cells which containt True if minterm is covered by PI, and False otherwise.
+    # Arguments: a list of prime implicants as (value, mask) cubes, and a list of minterms as integers.
+    # Returns: a 2-d numpy boolean array, table[PI][minterm], which contains True if minterm is covered by PI,
+    # and False otherwise.
     def createTable(self, PIList, mintermsList):
-        table = [[] for x in range (len(PIList))]
+        if len(PIList) == 0 or len(mintermsList) == 0:
+            return np.zeros((len(PIList), len(mintermsList)), dtype=bool)
 
-        #check which minterms are covered by which prime implicants
-        for i in range (len(mintermsList)):
-            for j in range(len(PIList)):
-                table[j].append(self.checkCoverage(mintermsList[i], PIList[j]))
+        values = self.termArray([pi[0] for pi in PIList])
+        masks = self.termArray([pi[1] for pi in PIList])
+        minterms = self.termArray(mintermsList)
 
+        # check which minterms are covered by which prime implicants, all at once
+        table = (minterms[np.newaxis, :] & ~masks[:, np.newaxis]) == values[:, np.newaxis]
 
-        return table
+        return table.astype(bool)
+
+
+    # createChart(self, PIList, mintermsList)
+    # creates the PI chart as row and column bitsets. It is built a block of rows (and then of columns) at a time
+    # with createTable, so the whole boolean table is never held in memory.
+    # Arguments: a list of prime implicants as (value, mask) cubes, and a list of minterms as integers.
+    # Returns: two lists: rows, where bit j of rows[i] is set if PI i covers minterm j, and cols, where bit i of
+    # cols[j] is set if minterm j is covered by PI i
+    def createChart(self, PIList, mintermsList):
+        rows = []
+        step = max(1, CHART_BLOCK // max(1, len(mintermsList)))
+        for start in range(0, len(PIList), step):
+            rows += self.tableRows(self.createTable(PIList[start:start + step], mintermsList))
+
+        cols = []
+        step = max(1, CHART_BLOCK // max(1, len(PIList)))
+        for start in range(0, len(mintermsList), step):
+            cols += self.tableRows(self.createTable(PIList, mintermsList[start:start + step]).T)
+
+        return rows, cols
         
         
 
@@ -164,249 +573,265 @@ class QMClass:
     # Returns: a list containing the literals of the minterm
     def groupLiterals(self, minterm):
         literals = []
-        str = ""
-        for i in range(len(minterm)):
+        # match the longest name first, so x1 is not read out of x10
+        names = sorted(self.varLetters, key=len, reverse=True)
+
+        i = 0
+        while i < len(minterm):
             str = ""
-            # if its a letter
-            if minterm[i] in self.varLetters:
-                str = minterm[i]
-                if ((i+1) < len(minterm)) and (minterm[i+1] == "'"):
-                    str += "'"
-            # if its a '
-            if minterm[i] != "'":
-                literals.append(str)
-            
-            
+            for name in names:
+                if minterm.startswith(name, i):
+                    str = name
+                    break
+
+            # skip anything that isn't a variable name
+            if not str:
+                i += 1
+                continue
+
+            i += len(str)
+            # if its complemented
+            if (i < len(minterm)) and (minterm[i] == "'"):
+                str += "'"
+                i += 1
+
+            literals.append(str)
         
         return literals
-        
 
-    # sortTerm(self, minterm) 
-    # sort the literals of the term in alphabetical order
-    # Arguments: a string of minterm literals
-    # Returns: the literal representation of the minterm as a string. 
-    def sortTerm(self, minterm):
-        
-        # group the minterm literals
-        sorted = self.groupLiterals(minterm)
-        
-        # sort in alphabetical order
-        sorted.sort()
 
-        # turn list into string
-        sorted = "".join(sorted)
+    # absorb(self, carried, grown, pis)
+    # applies the absorption law (X + XY = X) after one multiplication of Petrick's method. The previous result
+    # has no product absorbing another, so the carried products (which already have a PI of the sum) can't absorb
+    # each other, and neither can the grown products p | (1 << i). A grown product can only be absorbed by a
+    # carried product that has i and no PI outside p, which is found with bitsets of the carried products of
+    # every PI instead of comparing against every carried product.
+    # Arguments: a list of carried products, as bitsets of PI indices, a list of (p, indices) pairs, one for
+    # every grown product p and the PIs of the sum it is multiplied by, and the PIs of the sum
+    # Returns: a list of the grown (p, i) pairs that are not absorbed, or None if the time limit ran out
+    def absorb(self, carried, grown, pis):
+        # the carried products of every PI, as a bitset of their positions in carried
+        members = {}
+        for k, q in enumerate(carried):
+            for i in self.bitIndices(q):
+                members[i] = members.get(i, 0) | (1 << k)
+
+        everything = (1 << len(carried)) - 1
+        inSum = set(pis)
+        # the carried products with a PI of the sum other than i
+        others = {}
+        for i in pis:
+            others[i] = 0
+            for j in pis:
+                if j != i:
+                    others[i] |= members.get(j, 0)
+
+        kept = []
+        for n, (p, indices) in enumerate(grown):
+            if not n % 1024 and self.timeUp():
+                return None
+
+            # the carried products with a PI outside p that isn't in the sum
+            outside = 0
+            for i, ids in members.items():
+                if i not in inSum and not (p >> i) & 1:
+                    outside |= ids
+
+            for i in indices:
+                # a carried product left over has no PI outside p | (1 << i)
+                if not everything & ~(outside | others[i]):
+                    kept.append((p, i))
+
+        return kept
+
+
+    # greedyCover(self, minTermCover, costs)
+    # finds a cover quickly by repeatedly taking the PI that covers the most remaining minterms per unit of cost.
+    # The PIs are kept in a heap by the score they had when it was last computed. A score can only drop as
+    # minterms get covered, so only the PI on top is scored again, until its score is up to date. If the time
+    # limit runs out, every minterm left is covered by its cheapest PI instead.
+    # The result is a valid cover, but not necessarily a minimal one.
+    # Arguments: a list of sums, one for every minterm, each given as a bitset of the PIs covering the minterm,
+    # and the cost of every PI
+    # Returns: the cover as a bitset of PI indices
+    def greedyCover(self, minTermCover, costs):
+        # minterms covered by each PI
+        covers = {}
+        for c, eq in enumerate(minTermCover):
+            for i in self.bitIndices(eq):
+                covers[i] = covers.get(i, 0) | (1 << c)
+
+        # equal scores go to the PI that was found first
+        heap = [(-bin(row).count('1') / (costs[i] + 1), n, i) for n, (i, row) in enumerate(covers.items())]
+        heapq.heapify(heap)
+
+        remaining = (1 << len(minTermCover)) - 1
+        cover = 0
+
+        while remaining:
+            if self.timeUp():
+                for c in self.bitIndices(remaining):
+                    if (remaining >> c) & 1:
+                        i = min(self.bitIndices(minTermCover[c]), key=lambda i: costs[i])
+                        cover |= 1 << i
+                        remaining &= ~covers[i]
+                break
+
+            score, n, i = heapq.heappop(heap)
+            count = bin(covers[i] & remaining).count('1')
+            if not count:
+                continue
 
-        return sorted
-        
+            # the score went down since it was pushed, so put it back
+            if -count / (costs[i] + 1) != score:
+                heapq.heappush(heap, (-count / (costs[i] + 1), n, i))
+                continue
 
-    # simplifications(self, mintermList) 
-    # performs booelan algebra simpifications after taking the boolean AND of two boolean equations
-    # Arguments: a list of literal strings
-    # Returns: a list containing a simplified version of the input list
-    def simplifications(self, mintermList):
-        
-        allCombos = []
-        temp = []
-        
-        
-        for i in range(len(mintermList)):
-            temp = self.groupLiterals(mintermList[i])
-            
-            for j in range(len(mintermList)):
-                
-                count = 0
-                if (mintermList[i] == mintermList[j]) and (i == j):
+            cover |= 1 << i
+            remaining &= ~covers[i]
+
+        return cover
+
+
+    # petricksMethod(self, minTermCover, costs, bound) 
+    # performs Petrick's Method on the minterm covers 
+    # Arguments: a list of sums, one for every minterm, each given as a bitset of the PIs covering the minterm,
+    # the cost of every PI, and optionally the cost of a known cover. Products that cost more than the bound
+    # can't be part of the cheapest result, so they are dropped as soon as they pass it.
+    # Returns: the minimal products of petrick's method, as a list of bitsets of PI indices, or None if the
+    # time limit ran out
+    def petricksMethod(self, minTermCover, costs, bound=None):
+        result = [0]
+        productCosts = {0: 0}
+        
+        # multiply the shortest sums first, so the intermediate result stays small
+        for eq in sorted(minTermCover, key=lambda x: bin(x).count('1')):
+            # partial products aren't covers, so there is nothing to return
+            if self.timeUp():
+                return None
+
+            pis = self.bitIndices(eq)
+            carried = []
+            grown = []
+            self.checkMemory(len(result) * len(pis), PRODUCT_BYTES, "Petrick's method")
+
+            # take the boolean AND of the previous result and the current sum
+            for p in result:
+                # X(X + Y) = X
+                if p & eq:
+                    carried.append(p)
                     continue
-                    # allCombos.append(mintermList[i])
+
+                if bound is None:
+                    grown.append((p, pis))
                 else:
-                    for lit in temp:
-                        if (lit in mintermList[j]):
-                            count += 1
+                    grown.append((p, [i for i in pis if productCosts[p] + costs[i] <= bound]))
 
-                    if count == len(temp):
-                        
-                        allCombos.append(mintermList[i])
-        
-        allCombos = list(set(allCombos))
-        
-        if allCombos:
-            return allCombos
-        else:
-            return mintermList
-        
-    
-    # andTerms(self, term1, term2) 
-    # perform boolean AND between two terms
-    # Arguments: two terms in their literal representation as strings
-    # Returns: the boolean AND of the two terms, as a string. Empty string if the result is a boolean 0. 
-    def andTerms(self, term1,term2): 
-        
+            # remove products absorbed by smaller ones after every multiplication
+            self.record("petrickProducts", len(carried) + sum(len(indices) for p, indices in grown), add=True)
+            kept = self.absorb(carried, grown, pis)
 
-        # if either term is empty, return other term
-        if not term1:
-            return term2
-        if not term2:
-            return term1
+            if kept is None:
+                return None
 
-        res = ""
+            newCosts = {p: productCosts[p] for p in carried}
+            for p, i in kept:
+                newCosts[p | (1 << i)] = productCosts[p] + costs[i]
 
-        #group terms
-        grouped1 = self.groupLiterals(term1)
-        grouped2 = self.groupLiterals(term2)
-        
-        # perform boolean logic
-        for var in grouped1:
-            # AA' = 0
-            if var+"'" in grouped2:
-                return ""
-            # AA = A
-            else:
-                res += var
-            
-        for var in grouped2:
-            # A'A = 0
-            if var+"'" in grouped1:
-                return ""
-            # AB = AB
-            elif var not in grouped1:
-                res += var
-        
-        # sort resulting term alphabetically
-        res = self.sortTerm(res)
-        return res
+            result = list(newCosts)
+            productCosts = newCosts
 
-    
-    
-    # andEquations(self, eq1, eq2) 
-    # boolean AND two boolean equations
-    # Arguments: two lists of literal strings
-    # Returns: the boolean AND of the two lists, as a new list of literal strings
-    def andEquations(self, eq1, eq2):
-        
-        # if either equation is empty, return the other
-        if not eq1:
-            return eq2
-        if not eq2:
-            return eq1
+        return result
         
-        res = []
 
-        # AND each term in the two equations together
-        for i in eq1:
-            for j in eq2:
-                tmp = self.andTerms(i,j)
-                res.append(tmp) if tmp else None
-        
-        return res
+    # coverLowerBound(self, minTermCover, remaining, allowed, costs)
+    # finds a lower bound on the cost of covering the remaining minterms. Minterms that share no PI need
+    # different PIs, so the cheapest PI of each minterm in such an independent set can be added up.
+    # Arguments: a list of sums (bitsets of PIs) for every minterm, the bitset of remaining minterms, the bitset of
+    # PIs that may still be used, and the cost of every PI
+    # Returns: the lower bound as an integer
+    def coverLowerBound(self, minTermCover, remaining, allowed, costs):
+        bound = 0
+        used = 0
+
+        # minterms with the fewest PIs first, as they block the fewest other minterms
+        for c in sorted(self.bitIndices(remaining), key=lambda c: bin(minTermCover[c] & allowed).count('1')):
+            pis = minTermCover[c] & allowed
+            if pis & used:
+                continue
 
+            used |= pis
+            bound += min(costs[i] for i in self.bitIndices(pis))
 
-    # petricksMethod(self, minTermCover) 
-    # performs Petrick's Method on the minterm covers 
-    # Arguments: a list of literal strings (terms)
-    # Returns: the result of petrick's method on the input, as a list of literal strings.
-    def petricksMethod(self, minTermCover):
-        result = []
-        
-        for eq in minTermCover:
-            # keep track of the previous result
-            prevRes = result.copy()
-            # take the boolean AND of the previous result and the current equation
-            result = self.andEquations(result, eq)
-
-            # while the result is not fully simplified, keep simplifying 
-            while (not np.array_equal(result, prevRes)):
-                prevRes = result.copy()
-                result = self.simplifications(result)
-
-        #remove redundancies
-        result = list(set(result))
-        return result
-        
+        return bound
 
-    # cost(self, PI, numVariables) 
-    # calculates the hardware cost of a prime implicant
-    # Arguments: a prime implicant, as a string of literals, and the number of term variables as an integer.
-    # Returns: the hardwarre cost of the prime implicant, as an integer
-    def cost(self, PI, numVariables):
-        cube = self.groupLiterals(PI)
-        cubeSize = numVariables-len(cube)
-        
-        return (numVariables-cubeSize)
 
-    
+    # branchAndBound(self, minTermCover, costs, start) 
+    # searches for a cheapest cover directly: it branches on the PIs of the minterm with the fewest PIs, and
+    # drops a branch when its cost plus a lower bound for the rest can't beat the best cover found so far.
+    # Arguments: a list of sums, one for every minterm, each given as a bitset of the PIs covering the minterm,
+    # the cost of every PI, and a known cover (bitset of PIs) to start from
+    # Returns: a cheapest cover, as a list with one bitset of PI indices. If the time limit runs out, the best
+    # cover found so far is returned and self.isMinimal is set to False.
+    def branchAndBound(self, minTermCover, costs, start):
+        # minterms covered by each PI
+        covers = {}
+        for c, eq in enumerate(minTermCover):
+            for i in self.bitIndices(eq):
+                covers[i] = covers.get(i, 0) | (1 << c)
 
-    # minCost(self, eq1, eq2) 
-    # finds the prime implicants with the minimum hardware cost
-    # Arguments: a list of PIs in their literal representation
-    # Returns: a list of the PIs with the lowest hardware cost
-    def minCost(self, PI):
-        costs = []
-        index = []
-        minCosts = []
-
-        # find costs for each term
-        for term in PI:
-            costs.append(self.cost(term, len(term)))
-        
-        # find terms with the same cost
-        for i in range(len(costs)):
-            if costs[i] == min(costs):
-                index.append(i)
-        
-        # append terms with min cost to result
-        for i in index:
-            minCosts.append(PI[i])
+        best = [start, sum(costs[i] for i in self.bitIndices(start))]
+
+        def search(remaining, chosen, cost, allowed):
+            self.record("branchNodes", 1, add=True)
+            if not remaining:
+                if cost < best[1]:
+                    best[0], best[1] = chosen, cost
+                return
+
+            # stop searching, keep the best cover so far
+            if not self.isMinimal or self.timeUp():
+                self.isMinimal = False
+                return
+
+            # branch on the hardest minterm
+            column = min(self.bitIndices(remaining), key=lambda c: bin(minTermCover[c] & allowed).count('1'))
+            pis = minTermCover[column] & allowed
+            if not pis:
+                return
+
+            if cost + self.coverLowerBound(minTermCover, remaining, allowed, costs) >= best[1]:
+                return
+
+            # try the PIs that cover the most per unit of cost first
+            order = sorted(self.bitIndices(pis), key=lambda i: -bin(covers[i] & remaining).count('1') / (costs[i] + 1))
+            for i in order:
+                search(remaining & ~covers[i], chosen | (1 << i), cost + costs[i], allowed)
+
+                # every cover with this PI has been searched, later branches don't need it
+                allowed &= ~(1 << i)
+
+        search((1 << len(minTermCover)) - 1, 0, 0, sum(1 << i for i in covers))
+
+        return [best[0]]
+
+
+    # minCost(self, products, costs) 
+    # finds the products of PIs with the minimum hardware cost
+    # Arguments: a list of products, as bitsets of PI indices, and the cost of every PI
+    # Returns: a list of the products with the lowest hardware cost
+    def minCost(self, products, costs):
+        if not products:
+            return []
+
+        # find costs for each product
+        productCosts = [sum(costs[i] for i in self.bitIndices(p)) for p in products]
         
-        return minCosts
+        # keep products with the lowest cost
+        lowest = min(productCosts)
+        return [p for p, c in zip(products, productCosts) if c == lowest]
         
     
-    # complement(self, equation) 
-    # Complements a Sum of Products boolean equation into a Product of Sums boolean equation
-    # Arguments: a Sum of Products boolean equation as a string
-    # Returns: a Product of Sums boolean equation as a string
-    def complement(self, equation):
-        # split terms
-        eq = equation.split(" + ")
-
-        result = "("
-
-        for term in eq:
-
-            # str = ""
-            # for i in range(len(term)):
-            #     # complement every literal in the term
-            #     if term[i] in self.varLetters:
-            #         str += term[i]
-                    
-            #         if (i+1 == len(term)):
-            #             str += "'"
-                    
-            #         elif (term[i+1] == "'"):
-            #             continue
-                    
-            #         else: 
-            #             str += "'"
-            
-            grouped = self.groupLiterals(term)
-            for i, lit in enumerate(grouped):
-                if len(lit) == 1:
-                    grouped[i] = lit + "'"
-                else:
-                    grouped[i] = lit[0]
-            
-            result += " + ".join(grouped)
-            result += ")("
-            # for i in range(len(grouped)):
-            #     result += grouped[i]
-            #     if (i+1 != len(grouped)):
-            #         result += " + "
-            #     else:
-            #         result +=")("
-                    
-        result = result[:-1]
-        return result        
-        
-        
     # printSolution(self, solution) 
     # generates a string containing the POS form of a solution
     # Arguments: a list containing the terms of the solution
@@ -415,75 +840,91 @@ class QMClass:
         return " + ".join(solution)
     
 
-    # printAllSolutions(self, solution, closeCover, solType) 
-    # generates the output of the program
+    # formatSolutions(self, solution, closeCover, solType) 
+    # generates the boolean equation of every solution option
     # Arguments: two lists containing the terms of the solution and the close cover, and a string indicating
     # the type of boolean equation ("SOP" or "POS")
+    # Returns: a list of equations as strings, one per close cover option. Empty if there is no solution.
+    def formatSolutions(self, solution, closeCover, solType):
+        # POS equations are written from their sum terms
+        if solType == "POS":
+            return ["".join("(" + " + ".join(clause) + ")" for clause in clauses)
+                    for clauses in self.maxtermCover(solution, closeCover)]
+
+        equations = []
+
+        # add each of the close cover options to the solution
+        if closeCover:
+            options = [solution + [c] for c in closeCover]
+        elif solution:
+            options = [solution]
+        else:
+            options = []
+
+        for terms in options:
+            equations.append(self.printSolution(terms))
+
+        return equations
+
+
+    # maxtermCover(self, solution, closeCover)
+    # turns a cover of the OFF set into the sum terms of a POS equation, by complementing every literal
+    # Arguments: two lists containing the terms of the OFF set solution and its close cover
+    # Returns: a list with one entry per close cover option, each a list of sum terms, each a list of literals
+    def maxtermCover(self, solution, closeCover):
+        if closeCover:
+            options = [solution + c.split(" + ") for c in closeCover]
+        elif solution:
+            options = [solution]
+        else:
+            options = []
+
+        cover = []
+        for terms in options:
+            clauses = []
+            for term in terms:
+                clauses.append([lit[:-1] if lit.endswith("'") else lit + "'" for lit in self.groupLiterals(term)])
+            cover.append(clauses)
+
+        return cover
+
+
+    # printAllSolutions(self, solution, closeCover, solType, isMinimal) 
+    # generates the output of the program
+    # Arguments: two lists containing the terms of the solution and the close cover, a string indicating
+    # the type of boolean equation ("SOP" or "POS"), and whether the solution is proven minimal
     # Returns: None
-    def printAllSolutions(self, solution, closeCover, solType):
+    def printAllSolutions(self, solution, closeCover, solType, isMinimal=True):
         
         print("=====================")
         print("Solution is: ")
         
-        str = ""
-
-        # if there are close cover terms
-        if closeCover:
-            for i in range(len(closeCover)):
-                # add one of the close cover terms to the solution and print solution option
-                if solution:
-                    str = self.printSolution(solution)
-                    str += " + "
-                str += closeCover[i]
-
-                # print based on solution type
-                if solType == "SOP":
-                    print(str)
-                elif solType == "POS":
-                    print(self.complement(str))
-                
-                if (i < len(closeCover)-1):
-                    print("\n\tOR\n")
+        equations = self.formatSolutions(solution, closeCover, solType)
 
         # if there is no solution or close cover
-        elif not solution:
+        if not equations:
             print("There is no solution for the provided function.")
         
-        # if there is only solution terms
-        else: 
-            str = self.printSolution(solution)
-            if solType == "SOP":
-                print(str)
-            elif solType == "POS":
-                print(self.complement(str))
+        else:
+            print("\n\tOR\n\n".join(equations))
+
+        if not isMinimal:
+            print("(this solution is not proven minimal)")
 
         print("=====================")  
         
         
 
 
-    # findEPI(self, table, PIList, mintermList) 
+    # findEPI(self, cols, PIList) 
     # determines the essential prime implicants of a set of minterms
-    # Arguments: the PI table, a list of prime implicants, and a list of minterms
+    # Arguments: the columns of the PI chart as bitsets of PIs (see createChart), and a list of prime implicants
     # Returns: a list of the essential prime implicants
-    def findEPI(self, table, PIList, mintermList):
-
-        essentialPrimes = []
-        for i in range(len(mintermList)):
-            # count the number of PIs the minterm is covered by
-            count = 0
-            for j in range(len(PIList)):
-                if table[j][i] == True:
-                    count += 1
-                    temp = PIList[j]
-            
-            # if a minterm is only covered by one PI, then it's an EPI
-            if count == 1:
-                essentialPrimes.append(temp)
+    def findEPI(self, cols, PIList):
+        # if a minterm is only covered by one PI, then it's an EPI
+        rows = self.findEssentialRows(cols, (1 << len(PIList)) - 1, (1 << len(cols)) - 1)
 
-        # remove duplicates
-        essentialPrimes = list(set(essentialPrimes))
-        return essentialPrimes
+        return [PIList[j] for j in rows]
         
         
     # readFile(self, filname) 
@@ -500,244 +941,1139 @@ class QMClass:
         return lines
         
 
-    # printSolution(self, cubes, allBin, numVariables) 
-    # generates cube groups for the first step of the algorithm
-    # Arguments: a 3-d array for cubes, a list containing minterms and don't cares in binary form, and the number of
-    # bits the algorithm is using as an integer.
-    # Returns: None
-    def generateCubes(self,cubes, allBin, numVariables):
-        # cubes[i][j][k] : i is cube num, j is group num, k is minterm
-        for i in allBin:
-            for j in range(numVariables+1):
-                if i.count('1') == j:
-                    cubes[0][j].append(i)
-                    break
-    
-    # checkCubes(self, cubes, numVariables) 
-    # checks cubes that are combined into higher cubes
-    # Arguments: a 3-d array of cubes, and the number of bits the algorithm is using as an integer.
-    # Returns: a list of checked cubes.
-    def checkCubes(self, cubes, numVariables):
-        checkedCubes = []
-
-        # combine groups and check combined groups
-        for i in range(0, numVariables):
-            for j in range(0, numVariables):
-                cubes[i+1][j], check = self.combineGroups(cubes[i][j], cubes[i][j+1])
-                checkedCubes += check
-                
-                
-        # remove redundant cubes        
-        for i in range (numVariables+1):
-            for j in range (numVariables+1):
-                cubes[i][j] = list(set(cubes[i][j]))
-
-        checkedCubes = list(set(checkedCubes))
-        return checkedCubes
-
-    # findPI(self, cubes, checkedCubes, numVariables) 
-    # finds prime implicants from combined cubes
-    # Arguments: a 3-d array for cubes, a list of checked cubes, and the number of bits as an integer.
-    # Returns: a list of the prime implicants
-    def findPI(self, cubes, checkedCubes ,numVariables):
-        # finding prime implicants
-        primeImps = []
-        for i in range (numVariables+1):
-            for j in range (numVariables+1):
-                for term in cubes[i][j]:
-                    # all the non-checked terms in the table are prime implicants
-                    if term not in checkedCubes:
-                        primeImps.append(term)
-        
-        return primeImps
+    # mergeLevel(self, level, numVariables)
+    # combines every pair of adjacent cubes in one level of the cube table. Cubes are bucketed by the position of
+    # their dashes, so the neighbours of a cube are found with hash lookups instead of comparing against every cube
+    # of the next group. A merged cube is only generated from the pair that differs in its highest dash, so every
+    # cube of the next level is generated exactly once. The memory limit is checked while the next level grows.
+    # Arguments: a list of (value, mask) cubes that all have the same number of dashes, and the number of bits.
+    # Returns: two lists (combined, checklist): the cubes of the next level, and the cubes that were combined.
+    def mergeLevel(self, level, numVariables):
+        combined = []
+        checklist = []
 
+        # bucket cubes by dash positions
+        buckets = {}
+        for value, mask in level:
+            buckets.setdefault(mask, set()).add(value)
 
-    # reduceTable(self, essentialPrimes, mintermsBin, reducedMinterms, primeImps, solution) 
-    # removes essential primes and the minterms they cover from PI table
-    # Arguments: lists of essential primes, mintems in binary form, the list to store the reduced minterms in, a list
-    # of prime implicants, and the lost to sore solution in.
+        for mask, values in buckets.items():
+            own = list(values)
+            for start in range(0, len(own), MERGE_STEP):
+                self.mergeBucket(mask, values, own[start:start + MERGE_STEP], numVariables, combined, checklist)
+                self.checkMemory(len(level) + len(combined), CUBE_BYTES, "prime implicant generation")
+
+        return combined, checklist
+
+
+    # mergeBucket(self, mask, values, own, numVariables, combined, checklist)
+    # combines the cubes of one bucket of mergeLevel (cubes with the same dashes) with their neighbours
+    # Arguments: the mask of the bucket, the set of values of all its cubes, the values to combine (all of them,
+    # or a part when the bucket is split between processes), the number of bits, and the two lists to add the
+    # combined and checked cubes to
     # Returns: None
-    def reduceTable(self, essentialPrimes, mintermsBin, reducedMinterms, primeImps, solution):
-        for ep in essentialPrimes:
-        
-            for term in mintermsBin:
-                if self.checkCoverage(term, ep):
-                    if term in reducedMinterms:
-                        reducedMinterms.remove(term)
-            if ep in primeImps:
-                primeImps.remove(ep)
+    def mergeBucket(self, mask, values, own, numVariables, combined, checklist):
+        for value in own:
+            checked = False
+
+            for i in range(numVariables):
+                bit = 1 << i
+                # only look at bits that are not already eliminated
+                if mask & bit:
+                    continue
 
+                # neighbour differing in this bit only
+                if (value ^ bit) in values:
+                    checked = True
+
+                    # generate the merged cube once, from its lower half, when bit is its highest dash
+                    if not (value & bit) and bit > mask:
+                        combined.append((value, mask | bit))
+
+            if checked:
+                checklist.append((value, mask))
+
+
+    # generatePrimes(self, allList, numVariables) 
+    # generates the prime implicants one level of cubes at a time. The cubes of a level that were not combined
+    # are yielded once the next level is built, and only those two levels are kept in memory.
+    # Arguments: a list containing minterms and don't cares as integers, and the number of bits as an integer.
+    # Yields: the prime implicants as (value, mask) cubes, from the smallest cubes up
+    def generatePrimes(self, allList, numVariables):
+        level = [(i, 0) for i in set(allList)]
+        cubesPerLevel = []
+
+        # worker processes for large levels, started by the first one. Worker processes of a pool can't start
+        # their own pool.
+        pool = None
+        parallel = (self.mergeJobs > 1 and numVariables < 63 and not multiprocessing.current_process().daemon)
+
+        try:
+            while level:
+                cubesPerLevel.append(len(level))
+                self.record("cubesPerLevel", cubesPerLevel)
+
+                if parallel and pool is None and len(level) >= PARALLEL_MERGE_MIN:
+                    # start the tracker of shared memory first, so the workers share it instead of starting their own
+                    multiprocessing.resource_tracker.ensure_running()
+                    pool = multiprocessing.Pool(self.mergeJobs)
+
+                # combine this level into the next one
+                if pool is not None and len(level) >= PARALLEL_MERGE_MIN:
+                    combined, checked = self.mergeLevelParallel(level, numVariables, pool)
+                else:
+                    combined, checked = self.mergeLevel(level, numVariables)
+
+                # mergeLevel stops as soon as it passes the limit, the workers of mergeLevelParallel leave it to here
+                self.checkMemory(len(level) + len(combined), CUBE_BYTES, "prime implicant generation")
+
+                # the cubes that were not combined are prime implicants
+                checked = set(checked)
+                for cube in level:
+                    if cube not in checked:
+                        yield cube
+
+                level = combined
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+
+    # mergeLevelParallel(self, level, numVariables, pool) 
+    # does the same as mergeLevel in a pool of processes. The level is sorted by mask, so each bucket of cubes
+    # with the same dashes is a range of the array, and split into equal chunks. Each process combines the cubes
+    # of its chunk, looking their neighbours up in the whole bucket. The cubes are passed to the workers as integer
+    # arrays in shared memory.
+    # Arguments: a list of (value, mask) cubes that all have the same number of dashes, the number of bits, and
+    # a multiprocessing pool
+    # Returns: two lists (combined, checklist): the cubes of the next level, and the cubes that were combined.
+    def mergeLevelParallel(self, level, numVariables, pool):
+        # a level that is already over the limit leaves no budget for the workers
+        self.checkMemory(len(level), CUBE_BYTES, "prime implicant generation")
+
+        cubes = np.array(sorted(level, key=lambda cube: cube[1]), dtype=np.int64).T
+        shm = multiprocessing.shared_memory.SharedMemory(create=True, size=cubes.nbytes)
+        # the number of cubes each chunk has combined so far
+        counter = multiprocessing.shared_memory.SharedMemory(create=True, size=8 * (self.mergeJobs * 4 + 1))
+
+        try:
+            shared = np.ndarray(cubes.shape, dtype=np.int64, buffer=shm.buf)
+            shared[:] = cubes
+
+            # several chunks per process to even out the work
+            numChunks = self.mergeJobs * 4
+            bounds = sorted(set(k * len(level) // numChunks for k in range(numChunks))) + [len(level)]
+
+            # the workers stop when the next level would pass the memory limit, see mergeChunk
+            budget = self.memoryLimit // CUBE_BYTES - len(level) if self.memoryLimit is not None else None
+            counts = np.ndarray(len(bounds) - 1, dtype=np.int64, buffer=counter.buf)
+            counts[:] = 0
+
+            chunks = [(shm.name, counter.name, k, len(level), start, end, numVariables, budget)
+                      for k, (start, end) in enumerate(zip(bounds, bounds[1:]))]
+            results = pool.map(mergeChunk, chunks)
+            del counts
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+            counter.close()
+            counter.unlink()
 
+        combined = []
+        checklist = []
+        for combinedCubes, checkedCubes in results:
+            combined += list(zip(*combinedCubes.tolist())) if combinedCubes.size else []
+            checklist += list(zip(*checkedCubes.tolist())) if checkedCubes.size else []
+
+        return combined, checklist
+    
+
+    # reduceTable(self, essentialPrimes, rows, primeImps, mintermsBin, solution) 
+    # removes essential primes and the minterms they cover from PI table
+    # Arguments: a list of essential primes, the rows of the PI chart as bitsets, the lists of prime implicants and
+    # minterms that match the rows and columns of the chart, and the list to store the solution in.
+    # Returns: the bitsets of the rows (PIs) and columns (minterms) still in the chart
+    def reduceTable(self, essentialPrimes, rows, primeImps, mintermsBin, solution):
+        index = {pi: i for i, pi in enumerate(primeImps)}
+        aliveRows = (1 << len(primeImps)) - 1
+        remaining = (1 << len(mintermsBin)) - 1
+
+        # remove the essential primes and the minterms they cover
         for ep in essentialPrimes:
+            aliveRows &= ~(1 << index[ep])
+            remaining &= ~rows[index[ep]]
             solution.append(self.createLiterals(ep))
 
+        return aliveRows, remaining
+
+
+    # tableRows(self, table)
+    # packs every row of a boolean table into an integer bitset
+    # Arguments: a 2-d boolean numpy array (use table.T for the columns)
+    # Returns: a list of integers, where bit i of entry j is set if table[j][i] is True
+    def tableRows(self, table):
+        packed = np.packbits(table, axis=1, bitorder='little')
+        return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+
+
+    # bitIndices(self, bits)
+    # lists the positions of the set bits of a bitset
+    # Arguments: a bitset as an integer
+    # Returns: a list of the indices of the set bits, lowest first
+    def bitIndices(self, bits):
+        indices = []
+        while bits:
+            low = bits & -bits
+            indices.append(low.bit_length()-1)
+            bits ^= low
+
+        return indices
+
+
+    # cubeCost(self, cube)
+    # calculates the hardware cost of a prime implicant, which is its number of literals
+    # Arguments: a (value, mask) cube
+    # Returns: the hardware cost of the cube, as an integer
+    def cubeCost(self, cube):
+        return self.numVariables - bin(cube[1]).count('1')
+
+
+    # findEssentialRows(self, cols, aliveRows, remaining)
+    # finds the rows of a reduced table that are the only cover of some remaining column
+    # Arguments: the columns of the table as row bitsets, and the bitsets of the rows and columns still in the table
+    # Returns: a list of the essential row indices
+    def findEssentialRows(self, cols, aliveRows, remaining):
+        essential = []
+
+        for c in self.bitIndices(remaining):
+            covering = cols[c] & aliveRows
+
+            # only one row covers the column
+            if covering and not (covering & (covering-1)):
+                essential.append(covering.bit_length()-1)
+
+        return list(dict.fromkeys(essential))
+
+
+    # rowDominance(self, rows, cols, aliveRows, remaining, costs) 
+    # performs row dominance on reduced PI table: a row is removed if another row covers all of its remaining
+    # columns at no higher cost. Rows that cover nothing are removed too. Petrick's method returns every
+    # cheapest cover, so for it a row is only removed if the dominating row is cheaper: a row of equal cost
+    # can still be part of a cheapest cover.
+    # Arguments: the rows and columns of the table as bitsets, the bitsets of rows and columns still in the
+    # table, and the cost of every row
+    # Returns: the bitset of rows still in the table
+    def rowDominance(self, rows, cols, aliveRows, remaining, costs):
+        # extra cost a dominating row may have
+        slack = -1 if self.solver == "petrick" else 0
+
+        for i in self.bitIndices(aliveRows):
+            row = rows[i] & remaining
+            if not row:
+                aliveRows &= ~(1 << i)
+                continue
 
-    # rowDominance(self, primeImps, reducedMinterms, table, PIList) 
-    # performs row dominance on reduced PI table
-    # Arguments: lists of PIs, reduced minterms, PI table, and a copy of the PI list 
-    # Returns: None
-    def rowDominance(self, primeImps, reducedMinterms, table, PIList):
-        toRemove = []
-        
-        for i in range(len(primeImps)):
-            # count how many minterms are covered by PI
-            count = 0 
-            for j in range(len(reducedMinterms)):
-                if table[i][j]:
-                    count += 1 
-    
-            # if PI covers only one minterm, remove it
-            if count == 1:
-                toRemove.append(primeImps[i])
-            
-        # remove all PIs that only cover one term
-        for x in toRemove:
-            if x in primeImps:
-                PIList.remove(x)
+            # a dominating row has to cover the first column of this row as well
+            first = (row & -row).bit_length()-1
+            for j in self.bitIndices(cols[first] & aliveRows & ~(1 << i)):
+                if not (row & ~rows[j]) and costs[j] <= costs[i] + slack:
+                    aliveRows &= ~(1 << i)
+                    break
 
+        return aliveRows
 
-    # colDominance(self, primeImps, reducedMinterms, table, PIList) 
-    # performs column dominance on reduced PI table
-    # Arguments: PI table, reduced minterms, prime implicants, copy of reduced minterms. 
-    # Returns: None
-    def colDominance(self, table, reducedMinterms, primeImps, minterms):
-            #column dominance
-            toRemove = []
-            for i in range(len(reducedMinterms)):
-                # count number of prime implicants that cover each minterm 
-                count = 0 
-                for j in range(len(primeImps)):
-                    if table[j][i]:
-                        count += 1
-                
-                # if a minterm is covered by all PIs then remove it
-                if count == len(primeImps):
-                    toRemove.append(reducedMinterms[i])
-            
-            for x in toRemove:
-                if x in reducedMinterms:
-                    minterms.remove(x)  
 
+    # colDominance(self, rows, cols, aliveRows, remaining) 
+    # performs column dominance on reduced PI table: a column is removed if every row covering some other
+    # column also covers it, since covering the other column covers this one for free.
+    # Arguments: the rows and columns of the table as bitsets, and the bitsets of rows and columns still in the table
+    # Returns: the bitset of columns still in the table
+    def colDominance(self, rows, cols, aliveRows, remaining):
 
-    # findCloseCover(self, reducedMinterms, primeImps, table) 
-    # finds the close cover of the solution
-    # Arguments: a list of reduced minterms, a list of prime implicants, and the PI table 
-    # Returns: a list of close cover terms
-    def findCloseCover(self, reducedMinterms, primeImps, table):
+        for b in self.bitIndices(remaining):
+            # skip columns removed earlier in this pass
+            if not (remaining >> b) & 1:
+                continue
+
+            covering = cols[b] & aliveRows
+            if not covering:
+                continue
 
-        minTermCover = [[] for x in reducedMinterms]
-        # turn prime implicants of each minterm into boolean literals
-        for i in range(len(reducedMinterms)):
-            for j in range(len(primeImps)):
-                if table[j][i]:
-                    minTermCover[i].append(self.createLiterals(primeImps[j]))
+            # a dominating column is covered by the first row of this column as well
+            first = (covering & -covering).bit_length()-1
+            for a in self.bitIndices(rows[first] & remaining & ~(1 << b)):
+                if not (covering & ~cols[a]):
+                    remaining &= ~(1 << a)
+
+        return remaining
+
+
+    # reduceCover(self, rows, cols, costs, aliveRows, remaining)
+    # repeats essential row extraction, row dominance and column dominance on a covering table until nothing
+    # changes. What is left is the cyclic core of the table.
+    # Arguments: the rows and columns of the table as bitsets, the cost of every row, and optionally the bitsets of
+    # the rows and columns to start from (all of them by default)
+    # Returns: a list of the essential row indices, and the bitsets of the rows and columns in the cyclic core
+    def reduceCover(self, rows, cols, costs, aliveRows=None, remaining=None):
+        essential = []
+        if aliveRows is None:
+            aliveRows = (1 << len(rows)) - 1
+        if remaining is None:
+            remaining = (1 << len(cols)) - 1
+
+        # stopping early leaves a bigger core, which is still a correct one
+        changed = True
+        while changed and remaining and not self.timeUp():
+            before = (aliveRows, remaining)
+
+            # take essential rows and remove the columns they cover
+            for i in self.findEssentialRows(cols, aliveRows, remaining):
+                essential.append(i)
+                remaining &= ~rows[i]
+                aliveRows &= ~(1 << i)
+
+            aliveRows = self.rowDominance(rows, cols, aliveRows, remaining, costs)
+            remaining = self.colDominance(rows, cols, aliveRows, remaining)
+
+            changed = (aliveRows, remaining) != before
+
+        return essential, aliveRows, remaining
+
+
+    # solveCover(self, minTermCover, costs)
+    # solves a covering problem with the selected exact method, within the time limit
+    # Arguments: a list of sums, one for every minterm, each given as a bitset of the PIs covering the minterm,
+    # and the cost of every PI
+    # Returns: a list of the cheapest covers, as bitsets of PI indices
+    def solveCover(self, minTermCover, costs):
+
+        # a quick cover bounds the cost of the products worth keeping
+        start = self.greedyCover(minTermCover, costs)
+        bound = sum(costs[i] for i in self.bitIndices(start))
+
+        # perform the selected exact method
+        if self.solver == "branch":
+            products = self.branchAndBound(minTermCover, costs, start)
+        else:
+            products = self.petricksMethod(minTermCover, costs, bound)
+
+            # out of time, fall back to the quick cover
+            if products is None:
+                products = [start]
+                self.isMinimal = False
+
+        # find covers with the minimum cost
+        return self.minCost(products, costs)
 
-        # perform petrick's method   
-        closeCover = self.petricksMethod(minTermCover)
 
-        # find close covers with the minimum cost
-        closeCover = self.minCost(closeCover)
+    # findCloseCover(self, primeImps, minTermCover) 
+    # finds the close cover of the solution
+    # Arguments: a list of prime implicants, and the PIs covering each remaining minterm, as bitsets
+    # Returns: a list of close cover options, each one a string of terms joined by " + "
+    def findCloseCover(self, primeImps, minTermCover):
+        costs = [self.cubeCost(pi) for pi in primeImps]
+
+        products = self.solveCover(minTermCover, costs)
+
+        # turn prime implicants of each product into boolean literals
+        closeCover = []
+        for p in products:
+            closeCover.append(" + ".join(self.createLiterals(primeImps[i]) for i in self.bitIndices(p)))
 
         return closeCover
 
-    # reduceRemaining(self, primeImps, reducedMinterms, table, PIList) 
-    # This function runs the algorithm for creating reduced PI table and for finding the close cover 
-    # if there are minterms not covered by EPIs.  
-    # Arguments: lists of PIs, reduced minterms, all minterms in binary form, EPIs, solution, and list to store close cover in.
-    # Returns: None
-    def reduceRemaining(self, primeImps, reducedMinterms, mintermsBin, essentialPrimes, solution, closeCover):
-        # create reduced PI table
-        table = self.createTable(primeImps, reducedMinterms)
-        piCpy = primeImps.copy()
-        minCpy = reducedMinterms.copy()
+    # reduceRemaining(self, primeImps, rows, cols, aliveRows, remaining, solution) 
+    # This function reduces the PI table to its cyclic core and finds the close cover 
+    # if there are minterms not covered by EPIs. The size of the cyclic core is stored in self.cyclicCore.
+    # Arguments: the list of PIs, the rows and columns of the PI chart as bitsets, the bitsets of the rows and
+    # columns left after removing the EPIs, and the solution list.
+    # Returns: two lists: solution, close cover
+    def reduceRemaining(self, primeImps, rows, cols, aliveRows, remaining, solution):
+        closeCover = []
+        costs = [self.cubeCost(pi) for pi in primeImps]
 
+        # reduce table to its cyclic core
+        with self.phase("reduceCover"):
+            essential, aliveRows, remaining = self.reduceCover(rows, cols, costs, aliveRows, remaining)
 
-        #row dominance 
-        self.rowDominance(primeImps, reducedMinterms, table, piCpy)
-        
-        # column dominance
-        self.colDominance(table, reducedMinterms, primeImps, minCpy)
-        
-        # update reduced PI table and find new essential prime
-        if piCpy and minCpy: 
-            primeImps = piCpy
-            reducedMinterms = minCpy       
-            table = self.createTable(piCpy, minCpy)
-            essentialPrimes = self.findEPI(table, piCpy, minCpy)
-            
-  
-        self.reduceTable(essentialPrimes, mintermsBin, reducedMinterms, primeImps, solution)
-        
-        # remove duplicates
-        solution = list(set(solution))
+        for i in essential:
+            solution.append(self.createLiterals(primeImps[i]))
+
+        self.cyclicCore = (bin(aliveRows).count('1'), bin(remaining).count('1'))
 
         # if there are still minterms not covered after reducing reduced table, find close cover
-        if reducedMinterms:
-            closeCover = self.findCloseCover(reducedMinterms, primeImps, table)
+        if remaining:
+            with self.phase("closeCover"):
+                closeCover = self.findCloseCover(primeImps, [cols[c] & aliveRows for c in self.bitIndices(remaining)])
         
         return solution, closeCover
 
     # qmMethod(self, mintermsList, dontCaresList, allList, numVariables) 
     # performs QM Method
     # Arguments: integer lists of minterms, dont cares, all inputs, and the number of bits to perform QM on
-    # Returns: None
+    # Returns: two lists: solution (essential primes), close cover. If the time limit ran out, the close cover
+    # holds the best cover found and self.isMinimal is False.
     def qmMethod(self, mintermsList, dontCaresList, allList, numVariables):
+        # terms are kept as integers, and cubes as (value, mask) pairs until they are turned into literals
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.cyclicCore = (0, 0)
+        self.isMinimal = True
+        self.deadline = time.monotonic() + self.timeLimit if self.timeLimit is not None else None
+        mintermsBin = list(dict.fromkeys(mintermsList))
+
+        # find prime implicants
+        primeImps = self.findPrimes(allList, numVariables)
+
+        return self.coverPrimes(primeImps, mintermsBin)
+
+
+    # coverPrimes(self, primeImps, mintermsBin) 
+    # finds the essential primes and close cover of a set of minterms from their prime implicants, using the
+    # cover cache if it is enabled
+    # Arguments: a list of prime implicants as (value, mask) cubes, and a list of minterms (no duplicates)
+    # Returns: two lists: solution (essential primes), close cover
+    def coverPrimes(self, primeImps, mintermsBin):
         solution = []
         closeCover = []
-        
-        # creating binary representation of terms
-        numBits = "0"+ str(numVariables) +"b"
-        allBin = [(format(x, numBits)) for x in allList]
 
-        mintermsBin = [(format(x, numBits)) for x in mintermsList]
-        # dont_cares_bin = [(format(x, numBits)) for x in dontCaresList]
+        # equal rows of the chart are decided by their order, so the order the primes were generated in can't matter
+        primeImps = sorted(primeImps)
 
-        # creating cubes matrix
-        cubes = [[[] for row in range(numVariables+1)] for x in range(numVariables+1)]
+        # the cover only depends on the primes, the minterms, and how the result is written
+        key = (frozenset(primeImps), frozenset(mintermsBin), tuple(self.varLetters), self.solver)
+        if self.coverCache is not None:
+            cached = self.coverCache.get(key)
+            if cached is not None:
+                solution, closeCover, self.cyclicCore = cached
+                self.record("coverCacheHit", True)
+                return list(solution), list(closeCover)
 
-        
+        # making PI chart and finding essential primes
+        self.checkMemory(len(primeImps) * len(mintermsBin), CELL_BYTES, "the PI chart")
+        with self.phase("createTable"):
+            rows, cols = self.createChart(primeImps, mintermsBin)
+        self.record("chartSize", [len(primeImps), len(mintermsBin)])
 
-        
+        with self.phase("findEPI"):
+            essentialPrimes = self.findEPI(cols, primeImps)
+        self.record("essentialPrimes", len(essentialPrimes))
 
-        essentialPrimes = []
+        # exclude essential primes from reduced implicant table
+        with self.phase("reduceTable"):
+            aliveRows, remaining = self.reduceTable(essentialPrimes, rows, primeImps, mintermsBin, solution)
 
-        # group into cubes
-        self.generateCubes(cubes, allBin, numVariables)
-        
-        # combine and check cubes
-        checkedCubes = self.checkCubes(cubes, numVariables)
+        # if there are still minterms not covered, find close cover
+        if remaining:
+            with self.phase("reduceRemaining"):
+                solution, closeCover = self.reduceRemaining(primeImps, rows, cols, aliveRows, remaining, solution)
+        self.record("cyclicCore", list(self.cyclicCore))
+
+        # covers cut short by the time limit are not cached
+        if self.coverCache is not None and self.isMinimal:
+            self.coverCache.put(key, (tuple(solution), tuple(closeCover), self.cyclicCore))
+                
+        return solution, closeCover
+
+
+    # findPrimes(self, allList, numVariables) 
+    # finds the prime implicants of a care set, using the prime implicant cache if it is enabled
+    # Arguments: integer list of all inputs (minterms and dont cares), and the number of bits
+    # Returns: a list of prime implicants as (value, mask) cubes
+    def findPrimes(self, allList, numVariables):
+        key = (numVariables, frozenset(allList))
+        if self.primeCache is not None:
+            cached = self.primeCache.get(key)
+            if cached is not None:
+                self.record("primeCacheHit", True)
+                self.record("primeImplicants", len(cached))
+                return list(cached)
 
         # find prime implicants
-        primeImps = self.findPI(cubes, checkedCubes, numVariables)
-                    
+        with self.phase("generatePrimes"):
+            primeImps = list(self.generatePrimes(allList, numVariables))
+        self.record("primeImplicants", len(primeImps))
 
-        # making PI chart and finding essential primes
+        if self.primeCache is not None:
+            self.primeCache.put(key, tuple(primeImps))
 
-        table = self.createTable(primeImps, mintermsBin)
+        return primeImps
 
 
+    # setFunction(self, mintermsList, dontCaresList, numVariables) 
+    # minimizes a function and keeps its minterms, dont cares and prime implicants, so that it can be changed
+    # one term at a time with addTerm and removeTerm
+    # Arguments: integer lists of minterms and dont cares, and the number of bits
+    # Returns: two lists: solution, close cover
+    def setFunction(self, mintermsList, dontCaresList, numVariables):
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.onSet = set(mintermsList)
+        self.dcSet = set(dontCaresList) - self.onSet
 
-        # finding essential primes
+        # every minterm and dont care, to check cubes against
+        self.careMap = np.zeros(2**numVariables, dtype=bool)
+        self.careMap[list(self.onSet | self.dcSet)] = True
 
-        essentialPrimes = self.findEPI(table, primeImps, mintermsBin)
+        self.primeImps = self.findPrimes(list(self.onSet | self.dcSet), numVariables)
 
+        return self.resolve()
 
 
-        # exclude essential primes from reduced implicant table
+    # addTerm(self, term, dontCare) 
+    # adds a minterm or dont care to the function from setFunction, and minimizes it again. Only the prime
+    # implicants containing the new term are generated: the old primes stay, unless one of them grows into a
+    # new prime.
+    # Arguments: the term as an integer, and whether it is a dont care
+    # Returns: two lists: solution, close cover
+    def addTerm(self, term, dontCare=False):
+        if term < 0 or term >= 2**self.numVariables:
+            raise ValueError("term " + str(term) + " is out of range for " + str(self.numVariables) + " variables")
 
-        reducedMinterms = mintermsBin.copy()
+        self.onSet.discard(term)
+        self.dcSet.discard(term)
+        (self.dcSet if dontCare else self.onSet).add(term)
 
-        
-        self.reduceTable(essentialPrimes, mintermsBin, reducedMinterms, primeImps, solution)
-        
+        # moving a term between the minterms and dont cares doesn't change the prime implicants
+        if not self.careMap[term]:
+            self.careMap[term] = True
+            newPrimes = self.primesContaining(term)
+
+            # old primes inside a new prime are no longer prime
+            self.primeImps = [pi for pi in self.primeImps
+                              if not any(self.cubeContains(new, pi) for new in newPrimes)] + newPrimes
+
+        return self.resolve()
+
+
+    # removeTerm(self, term) 
+    # removes a minterm or dont care from the function from setFunction, and minimizes it again. Primes that
+    # don't contain the term stay prime. A prime containing it is replaced by its halves that don't contain it,
+    # and halves inside another prime are dropped.
+    # Arguments: the term as an integer
+    # Returns: two lists: solution, close cover
+    def removeTerm(self, term):
+        self.onSet.discard(term)
+        self.dcSet.discard(term)
+
+        if 0 <= term < 2**self.numVariables and self.careMap[term]:
+            self.careMap[term] = False
+
+            kept = [pi for pi in self.primeImps if (term & ~pi[1]) != pi[0]]
+            halves = set()
+            for value, mask in self.primeImps:
+                if (term & ~mask) != value:
+                    continue
+
+                # fix one eliminated variable to the opposite of the removed term
+                for i in self.bitIndices(mask):
+                    bit = 1 << i
+                    halves.add((value | (~term & bit), mask & ~bit))
+
+            # the halves that are not inside another candidate are the new primes
+            candidates = kept + list(halves)
+            self.primeImps = kept + [h for h in halves
+                                     if not any(c != h and self.cubeContains(c, h) for c in candidates)]
+
+        return self.resolve()
+
+
+    # resolve(self) 
+    # finds the cover of the function kept by setFunction, from its current prime implicants
+    # Arguments: None
+    # Returns: two lists: solution, close cover
+    def resolve(self):
+        self.cyclicCore = (0, 0)
+        self.isMinimal = True
+        self.deadline = time.monotonic() + self.timeLimit if self.timeLimit is not None else None
+
+        return self.coverPrimes(list(self.primeImps), sorted(self.onSet))
+
+
+    # cubeContains(self, outer, inner) 
+    # Arguments: two (value, mask) cubes
+    # Returns: True if every term of inner is in outer
+    def cubeContains(self, outer, inner):
+        return (outer[1] & inner[1]) == inner[1] and (inner[0] & ~outer[1]) == outer[0]
+
+
+    # primesContaining(self, term) 
+    # finds the prime implicants of the kept function that contain a term, by growing cubes around the term one
+    # variable at a time. A cube doubles along a variable if the other half is all minterms and dont cares.
+    # Arguments: the term as an integer (a minterm or dont care)
+    # Returns: a list of prime implicants as (value, mask) cubes
+    def primesContaining(self, term):
+        isImplicant = {0: True}
+        level = [0]
+        primes = []
+
+        while level:
+            nextLevel = set()
+            for mask in level:
+                grows = False
+                for i in range(self.numVariables):
+                    bit = 1 << i
+                    if mask & bit:
+                        continue
+
+                    bigger = mask | bit
+                    if bigger not in isImplicant:
+                        # the terms of the other half
+                        other = (term & ~bigger) | (~term & bit)
+                        isImplicant[bigger] = bool(self.careMap[other | subcubeOffsets(mask)].all())
+
+                    if isImplicant[bigger]:
+                        grows = True
+                        nextLevel.add(bigger)
+
+                if not grows:
+                    primes.append((term & ~mask, mask))
+
+            level = nextLevel
+
+        return primes
+
+
+    # countCovered(self, cube, terms)
+    # counts how many of the given terms a cube covers
+    # Arguments: a (value, mask) cube, and a numpy array of terms (no duplicates)
+    # Returns: the number of terms covered by the cube, as an integer
+    def countCovered(self, cube, terms):
+        return int(np.count_nonzero((terms & ~cube[1]) == cube[0]))
+
+
+    # isImplicant(self, cube, care)
+    # checks if a cube only covers minterms and don't cares, by counting the care terms inside it. The cube's
+    # own minterms are never listed, so this works for cubes of any size.
+    # Arguments: a (value, mask) cube, and a numpy array of all minterms and don't cares (no duplicates)
+    # Returns: True if the cube is an implicant, False otherwise
+    def isImplicant(self, cube, care):
+        return self.countCovered(cube, care) == 2**bin(cube[1]).count('1')
+
+
+    # supercube(self, terms)
+    # finds the smallest cube containing a set of terms
+    # Arguments: a non-empty list of terms as integers
+    # Returns: a (value, mask) cube
+    def supercube(self, terms):
+        mask = 0
+        for t in terms:
+            mask |= t ^ terms[0]
+
+        return (terms[0] & ~mask, mask)
+
+
+    # espressoExpand(self, cover, implicant)
+    # EXPAND step: raises every cube into a prime implicant, trying first the variables that move it towards
+    # the most other cubes of the cover, and drops the cubes that the expanded cube covers.
+    # Arguments: a list of (value, mask) cubes, and a function that checks if a cube is an implicant
+    # Returns: the expanded cover as a list of cubes
+    def espressoExpand(self, cover, implicant):
+        expanded = []
+        allBits = (1 << self.numVariables) - 1
+
+        # expand the smallest cubes first, they are the least likely to be covered by others
+        cover = sorted(cover, key=lambda c: bin(c[1]).count('1'))
+        values = self.termArray([c[0] for c in cover])
+        masks = self.termArray([c[1] for c in cover])
+        covered = np.zeros(len(cover), dtype=bool)
+
+        for k, (value, mask) in enumerate(cover):
+            if covered[k]:
+                continue
+
+            # how many cubes lie in the direction of each free variable
+            diff = (values ^ value) & ~masks & ~mask
+            free = [1 << i for i in range(self.numVariables) if not (mask >> i) & 1]
+            free.sort(key=lambda bit: -int(np.count_nonzero(diff & bit)))
+
+            for bit in free:
+                cube = (value & ~bit, mask | bit)
+                if implicant(cube):
+                    value, mask = cube
+
+            # cubes contained in the new prime are not needed anymore
+            covered |= ((values & ~mask) == value) & ((masks & ~mask) == 0)
+            expanded.append((value, mask & allBits))
+
+        return list(dict.fromkeys(expanded))
+
+
+    # espressoIrredundant(self, cover, table)
+    # IRREDUNDANT step: removes cubes whose minterms are all covered by other cubes, largest cost first
+    # Arguments: a list of (value, mask) cubes, and a 2-d numpy boolean array, table[cube][k], which is True if
+    # the cube covers minterm k (see createTable)
+    # Returns: the cover without redundant cubes
+    def espressoIrredundant(self, cover, table):
+        if not cover:
+            return cover
+
+        counts = table.sum(axis=0)
+        keep = np.ones(len(cover), dtype=bool)
+
+        # try to remove the cubes with the most literals first
+        for k in sorted(range(len(cover)), key=lambda k: -self.cubeCost(cover[k])):
+            # every minterm of the cube is covered by another cube
+            if np.all(counts[table[k]] > 1):
+                keep[k] = False
+                counts -= table[k]
+
+        return [c for c, k in zip(cover, keep) if k]
+
+
+    # espressoReduce(self, cover, on)
+    # REDUCE step: shrinks every cube to the smallest cube containing the minterms only it covers, so the next
+    # EXPAND step can move it in a different direction. Cubes that cover nothing of their own are removed.
+    # Arguments: a list of (value, mask) cubes, and a numpy array of the minterms
+    # Returns: the reduced cover as a list of cubes
+    def espressoReduce(self, cover, on):
+        table = self.createTable(cover, on)
+        counts = table.sum(axis=0)
+        reduced = []
+
+        # reduce the largest cubes first
+        for k in sorted(range(len(cover)), key=lambda k: -bin(cover[k][1]).count('1')):
+            unique = table[k] & (counts == 1)
+            if not unique.any():
+                counts -= table[k]
+                continue
+
+            cube = self.supercube(on[unique].tolist())
+            reduced.append(cube)
+
+            # the reduced cube covers fewer minterms from now on
+            newRow = ((on & ~cube[1]) == cube[0])
+            counts += newRow.astype(counts.dtype) - table[k]
+
+        return reduced
+
+
+    # coverCost(self, cover)
+    # calculates the cost of a cover, used to compare the results of espresso iterations
+    # Arguments: a list of (value, mask) cubes
+    # Returns: a tuple (number of cubes, number of literals)
+    def coverCost(self, cover):
+        return (len(cover), sum(self.cubeCost(c) for c in cover))
+
+
+    # espressoMethod(self, mintermsList, dontCaresList, numVariables)
+    # heuristic alternative to qmMethod for large functions. It works on a cover of cubes directly, repeating the
+    # EXPAND, IRREDUNDANT and REDUCE steps of Espresso while the cover gets cheaper. Prime implicants and the
+    # 2^n minterms of the function are never listed, so it handles functions with many variables and sparse
+    # minterms. The result is not proven minimal, so self.isMinimal is set to False.
+    # Arguments: integer lists of minterms and dont cares, and the number of bits
+    # Returns: two lists: solution, close cover (always empty)
+    def espressoMethod(self, mintermsList, dontCaresList, numVariables):
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.cyclicCore = (0, 0)
+        self.isMinimal = False
+        self.deadline = time.monotonic() + self.timeLimit if self.timeLimit is not None else None
+
+        on = self.termArray(sorted(set(mintermsList)))
+        care = self.termArray(sorted(set(mintermsList) | set(dontCaresList or [])))
+
+        def implicant(cube):
+            return self.isImplicant(cube, care)
+
+        # start from the minterms themselves
+        cover = [(m, 0) for m in on.tolist()]
+        cover = self.espressoExpand(cover, implicant)
+        cover = self.espressoIrredundant(cover, self.createTable(cover, on))
+        cost = self.coverCost(cover)
+
+        # REDUCE, EXPAND, IRREDUNDANT until the cover stops improving
+        while cover and not self.timeUp():
+            newCover = self.espressoReduce(cover, on)
+            newCover = self.espressoExpand(newCover, implicant)
+            newCover = self.espressoIrredundant(newCover, self.createTable(newCover, on))
+            newCost = self.coverCost(newCover)
+            self.record("espressoPasses", 1, add=True)
+
+            if newCost >= cost:
+                break
+
+            cover, cost = newCover, newCost
+
+        solution = [self.createLiterals(c) for c in cover]
+        return solution, []
+
+
+    # complementCubes(self, terms, numVariables)
+    # splits the space of all terms into disjoint cubes that contain none of the given terms, by halving every
+    # cube that contains some of them on its highest free variable
+    # Arguments: a list of terms as integers, and the number of bits
+    # Returns: a list of (value, mask) cubes, covering every term that is not in the list
+    def complementCubes(self, terms, numVariables):
+        cubes = []
+        stack = [((0, (1 << numVariables) - 1), self.termArray(sorted(set(terms))))]
+
+        while stack:
+            (value, mask), inside = stack.pop()
+            if len(inside) == 0:
+                cubes.append((value, mask))
+                continue
+
+            # the cube is one of the terms
+            if not mask:
+                continue
+
+            bit = 1 << (mask.bit_length()-1)
+            upper = (inside & bit) != 0
+            stack.append(((value, mask & ~bit), inside[~upper]))
+            stack.append(((value | bit, mask & ~bit), inside[upper]))
+
+        return cubes
+
+
+    # espressoOffSet(self, mintermsList, dontCaresList, numVariables)
+    # espressoMethod for the OFF set of a function (for the POS form), without listing its terms. It starts from
+    # the disjoint cubes of the complement of the minterms and dont cares instead of single terms, and expands
+    # them while they contain no minterm. IRREDUNDANT then treats every starting cube as one "minterm" that must
+    # stay inside one cube of the cover. The REDUCE step needs the listed terms, so there is a single pass.
+    # Arguments: integer lists of minterms and dont cares (of the function itself), and the number of bits
+    # Returns: two lists: solution for the OFF set, close cover (always empty)
+    def espressoOffSet(self, mintermsList, dontCaresList, numVariables):
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.cyclicCore = (0, 0)
+        self.isMinimal = False
+
+        on = self.termArray(sorted(set(mintermsList)))
+
+        def implicant(cube):
+            return self.countCovered(cube, on) == 0
+
+        parts = self.complementCubes(list(mintermsList) + list(dontCaresList or []), numVariables)
+        cover = self.espressoExpand(parts, implicant)
+
+        # table[cube][k] is True if the cube contains the starting cube k
+        values = self.termArray([c[0] for c in cover])
+        masks = self.termArray([c[1] for c in cover])
+        partValues = self.termArray([p[0] for p in parts])
+        partMasks = self.termArray([p[1] for p in parts])
+        table = (((partMasks[np.newaxis, :] & ~masks[:, np.newaxis]) == 0) &
+                 ((partValues[np.newaxis, :] & ~masks[:, np.newaxis]) == values[:, np.newaxis]))
+
+        cover = self.espressoIrredundant(cover, table)
+
+        solution = [self.createLiterals(c) for c in cover]
+        return solution, []
+
+    # findMultiOutputPI(self, mintermsLists, dontCaresLists, numVariables)
+    # generates the multi-output prime implicants of several functions over the same inputs. Every cube is
+    # tagged with a bitset of the outputs it is an implicant of, and two cubes are only merged for the outputs
+    # they share. A cube is prime unless a bigger cube serves all of its outputs.
+    # Arguments: a list of minterm lists and a list of dont care lists (one of each per output), and the number
+    # of bits
+    # Returns: a list of (cube, outputs) pairs, where outputs is a bitset of output indices
+    def findMultiOutputPI(self, mintermsLists, dontCaresLists, numVariables):
+        # tag every term with the outputs it is a minterm or dont care of
+        level = {}
+        for k, terms in enumerate(mintermsLists):
+            for t in list(terms) + list(dontCaresLists[k] or []):
+                level[(t, 0)] = level.get((t, 0), 0) | (1 << k)
+
+        primes = []
+        while level:
+            nextLevel = {}
+            checked = set()
+
+            for (value, mask), tag in level.items():
+                for i in range(numVariables):
+                    bit = 1 << i
+                    if mask & bit:
+                        continue
+
+                    shared = tag & level.get((value ^ bit, mask), 0)
+                    if not shared:
+                        continue
+
+                    # the bigger cube serves all the outputs of this one
+                    if shared == tag:
+                        checked.add((value, mask))
+
+                    # generate the merged cube once, from its lower half, when bit is its highest dash
+                    if not (value & bit) and bit > mask:
+                        nextLevel[(value, mask | bit)] = shared
+
+            primes += [(cube, tag) for cube, tag in level.items() if cube not in checked]
+            level = nextLevel
+
+        return primes
+
+
+    # multiOutputMethod(self, mintermsLists, dontCaresLists, numVariables)
+    # minimizes several functions over the same inputs together, so a product term used by more than one output
+    # is chosen (and counted) once. The covering problem has one column for every (output, minterm) pair and one
+    # row for every multi-output prime implicant.
+    # Arguments: a list of minterm lists and a list of dont care lists (one of each per output), and the number
+    # of bits
+    # Returns: a list of solutions, one per output, each a list of terms. Equal terms in different outputs are
+    # the same shared product.
+    def multiOutputMethod(self, mintermsLists, dontCaresLists, numVariables):
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.isMinimal = True
+        self.deadline = time.monotonic() + self.timeLimit if self.timeLimit is not None else None
+
+        primes = self.findMultiOutputPI(mintermsLists, dontCaresLists, numVariables)
+        cubes = [cube for cube, tag in primes]
+
+        # build the covering table, one block of columns per output
+        minTermCover = []
+        for k, terms in enumerate(mintermsLists):
+            rows = [i for i, (cube, tag) in enumerate(primes) if (tag >> k) & 1]
+            table = self.createTable([cubes[i] for i in rows], list(dict.fromkeys(terms)))
+
+            for column in self.tableRows(table.T):
+                minTermCover.append(sum(1 << rows[j] for j in self.bitIndices(column)))
+
+        # reduce the table, and solve what is left
+        cols = minTermCover
+        rowBits = [0] * len(primes)
+        for c, eq in enumerate(cols):
+            for i in self.bitIndices(eq):
+                rowBits[i] |= 1 << c
+
+        costs = [self.cubeCost(cube) for cube in cubes]
+        essential, aliveRows, remaining = self.reduceCover(rowBits, cols, costs)
+        self.cyclicCore = (bin(aliveRows).count('1'), bin(remaining).count('1'))
+
+        chosen = sum(1 << i for i in essential)
+        if remaining:
+            core = [cols[c] & aliveRows for c in self.bitIndices(remaining)]
+            chosen |= self.solveCover(core, costs)[0]
+
+        # every output uses the chosen products it needs
+        solutions = []
+        for k, terms in enumerate(mintermsLists):
+            used = [cubes[i] for i in self.bitIndices(chosen) if (primes[i][1] >> k) & 1]
+            used = self.espressoIrredundant(used, self.createTable(used, sorted(set(terms))))
+            solutions.append([self.createLiterals(cube) for cube in used])
+
+        return solutions
+
+
+    # termToCube(self, term)
+    # converts a product term back into a cube, using the current variable names
+    # Arguments: a string of a product term, e.g. AB'D
+    # Returns: a (value, mask) cube
+    def termToCube(self, term):
+        value = 0
+        mask = 2**self.numVariables - 1
+
+        for lit in self.groupLiterals(term):
+            bit = 1 << (self.numVariables - 1 - self.varLetters.index(lit.rstrip("'")))
+            mask &= ~bit
+            if not lit.endswith("'"):
+                value |= bit
+
+        return value, mask
+
+
+    # npnCanonical(self, mintermsList, numVariables)
+    # finds the NPN class representative of a completely specified function: the smallest truth table that can
+    # be reached by permuting and negating the inputs and negating the output
+    # Arguments: integer list of minterms, and the number of variables (up to 6)
+    # Returns: the representative truth table as an integer (bit y is the output for y), the phase (1 if the
+    # output was negated), and the index of the transform into npnTransforms(numVariables)
+    def npnCanonical(self, mintermsList, numVariables):
+        perms, negs, maps = npnTransforms(numVariables)
+
+        truthTable = np.zeros(2**numVariables, dtype=bool)
+        truthTable[mintermsList] = True
+
+        # the truth table of every transform, packed into one 64 bit integer each
+        tables = np.zeros((len(maps), 64), dtype=bool)
+        tables[:, :2**numVariables] = truthTable[maps]
+        codes = np.packbits(tables, axis=1, bitorder='little').view('<u8').ravel()
+        complements = codes ^ np.uint64(2**(2**numVariables) - 1)
+
+        t0 = int(np.argmin(codes))
+        t1 = int(np.argmin(complements))
+        if int(complements[t1]) < int(codes[t0]):
+            return int(complements[t1]), 1, t1
+
+        return int(codes[t0]), 0, t0
+
+
+    # npnMethod(self, mintermsList, numVariables)
+    # minimizes a completely specified function of up to 6 variables through its NPN class representative. The
+    # cover of the representative is cached in npnCache, and moved back onto the inputs of this function. The
+    # result is also cached under the function's own truth table, so repeating a function skips the search for
+    # the representative.
+    # Arguments: integer list of minterms, and the number of variables (up to 6)
+    # Returns: two lists: solution, close cover
+    def npnMethod(self, mintermsList, numVariables):
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.cyclicCore = (0, 0)
+        self.isMinimal = True
+
+        truthTable = sum(1 << m for m in set(mintermsList))
+        exactKey = (numVariables, truthTable, self.solver, tuple(self.varLetters))
+        cached = npnCache.get(exactKey)
+        if cached is not None:
+            return list(cached[0]), list(cached[1])
+
+        perms, negs, maps = npnTransforms(numVariables)
+        representative, phase, t = self.npnCanonical(mintermsList, numVariables)
+
+        # the function is the representative (or its complement) applied to the transformed inputs
+        key = (numVariables, representative, phase, self.solver)
+        cached = npnCache.get(key)
+
+        if cached is None:
+            if phase:
+                representative ^= 2**(2**numVariables) - 1
+            terms = [y for y in range(2**numVariables) if (representative >> y) & 1]
+
+            solution, closeCover = self.qmMethod(terms, [], terms, numVariables)
+            cached = ([self.termToCube(term) for term in solution],
+                      [[self.termToCube(term) for term in option.split(" + ")] for option in closeCover])
+
+            if self.isMinimal:
+                npnCache.put(key, cached)
+
+        # move each cube back: bit i of this function is bit perms[t][i] of the representative
+        def transform(cube):
+            value, mask = 0, 0
+            for i, j in enumerate(perms[t]):
+                if (cube[1] >> j) & 1:
+                    mask |= 1 << i
+                else:
+                    value |= (((cube[0] >> j) & 1) ^ ((int(negs[t]) >> i) & 1)) << i
+            return self.createLiterals((value, mask))
+
+        solution = [transform(cube) for cube in cached[0]]
+        closeCover = [" + ".join(transform(cube) for cube in option) for option in cached[1]]
+
+        if self.isMinimal:
+            npnCache.put(exactKey, (solution, tuple(closeCover)))
+
+        return solution, closeCover
+
+
+    # tableMethod(self, mintermsList, dontCaresList, numVariables)
+    # looks a function of up to 4 variables up in the precomputed table. Smaller functions are looked up as
+    # 4 variable functions that don't depend on the extra (most significant) variables. With dont cares, every
+    # way of setting them is looked up and the cheapest one is used.
+    # Arguments: integer lists of minterms and dont cares, and the number of variables (up to 4)
+    # Returns: two lists: solution, close cover, or None if the table file doesn't exist
+    def tableMethod(self, mintermsList, dontCaresList, numVariables):
+        table = loadTable()
+        if table is None:
+            return None
+
+        self.numVariables = numVariables
+        self.varLetters = self.getVarNames(numVariables)
+        self.cyclicCore = (0, 0)
+        self.isMinimal = True
+
+        # repeat the terms over the extra variables
+        copies = range(0, 16, 2**numVariables)
+        on = sum(1 << (x + k) for x in set(mintermsList) for k in copies)
+        dc = sum(1 << (x + k) for x in set(dontCaresList) - set(mintermsList) for k in copies)
+
+        # all functions between the minterms and the minterms plus dont cares
+        functions = np.array([on])
+        for bit in range(16):
+            if (dc >> bit) & 1:
+                functions = np.concatenate([functions, functions | (1 << bit)])
+        function = int(functions[np.argmin(table["costs"][functions])])
+
+        data = table["data"][table["offsets"][function]:table["offsets"][function + 1]].tolist()
+        low = 2**numVariables - 1
+
+        # read a count, then that many cubes, keeping the bits of the real variables
+        def readCubes(i):
+            cubes = [self.createLiterals((b & low, (b >> 4) & low)) for b in data[i + 1:i + 1 + data[i]]]
+            return cubes, i + 1 + data[i]
+
+        solution, i = readCubes(0)
+        closeCover = []
+        numOptions = data[i]
+        i += 1
+        for option in range(numOptions):
+            cubes, i = readCubes(i)
+            closeCover.append(" + ".join(cubes))
+
+        # the branch and bound solver only returns one cover
+        if self.solver == "branch":
+            closeCover = closeCover[:1]
 
-        # if there are still minterms not covered, find close cover
-        if reducedMinterms:
-            solution, closeCover = self.reduceRemaining(primeImps, reducedMinterms, mintermsBin, essentialPrimes, solution, closeCover)
-        
-                
         return solution, closeCover
 
+
+    # minimize(self, mintermsList, dontCaresList, allList, numVariables, pos)
+    # runs the minimization method selected in the constructor (qmMethod, or espressoMethod if heuristic). If there
+    # is a disk cache, the result is looked up there first, and stored there afterwards. If stats are enabled,
+    # they are cleared first and then hold the times and counters of this call.
+    # Arguments: integer lists of minterms, dont cares, all inputs, the number of bits, and whether to minimize
+    # the OFF set of the function instead (for the POS form)
+    # Returns: two lists: solution, close cover
+    def minimize(self, mintermsList, dontCaresList, allList, numVariables, pos=False):
+        if self.stats is not None:
+            self.stats.clear()
+
+        with self.phase("total"):
+            # espressoOffSet works from the minterms, so the OFF set is only listed for the exact method
+            if pos and not self.heuristic:
+                mintermsList = self.offSet(mintermsList, dontCaresList, numVariables)
+                allList = mintermsList + list(dontCaresList)
+                pos = False
+
+            if self.table and not self.heuristic and numVariables <= 4:
+                result = self.tableMethod(mintermsList, set(allList) - set(mintermsList), numVariables)
+                if result is not None:
+                    self.record("method", "table")
+                    return result
+
+            key = None
+            if self.diskCache is not None:
+                varLetters = self.getVarNames(numVariables)
+                method = (tuple(varLetters), "heuristic" if self.heuristic else self.solver) + (("POS",) if pos else ())
+                key = self.diskCache.makeKey(numVariables, mintermsList, set(allList) | set(dontCaresList), method)
+
+                cached = self.diskCache.get(key)
+                if cached is not None:
+                    self.numVariables = numVariables
+                    self.varLetters = varLetters
+                    self.isMinimal = cached["isMinimal"]
+                    self.record("method", "diskCache")
+                    return cached["solution"], cached["closeCover"]
+
+            try:
+                if self.heuristic and pos:
+                    self.record("method", "espresso")
+                    solution, closeCover = self.espressoOffSet(mintermsList, dontCaresList, numVariables)
+                elif self.heuristic:
+                    self.record("method", "espresso")
+                    solution, closeCover = self.espressoMethod(mintermsList, dontCaresList, numVariables)
+                elif self.npn and mintermsList and numVariables == 6 and set(allList) == set(mintermsList):
+                    self.record("method", "npn")
+                    solution, closeCover = self.npnMethod(mintermsList, numVariables)
+                else:
+                    self.record("method", "qm")
+                    solution, closeCover = self.qmMethod(mintermsList, dontCaresList, allList, numVariables)
+
+            # over the memory limit, use the heuristic instead
+            except QMTooLargeError as e:
+                if self.onTooLarge == "error":
+                    raise
+                self.record("method", "espresso")
+                self.record("tooLarge", str(e))
+                solution, closeCover = self.espressoMethod(mintermsList, set(allList) - set(mintermsList),
+                                                           numVariables)
+
+            # covers cut short by the time limit are not stored
+            if key is not None and (self.isMinimal or self.heuristic):
+                self.diskCache.put(key, {"solution": solution, "closeCover": closeCover, "isMinimal": self.isMinimal})
+
+            return solution, closeCover
+
     # formatInput(self, input) 
     # splits input into lists of minterms and don't cares
     # Arguments: a string of the input
@@ -754,57 +2090,323 @@ class QMClass:
             dontCares = terms[1].strip("d()")
         return minterms, dontCares
 
-    # runQM(self, input) 
-    # runs QM method
-    # Arguments: string input into program
-    # Returns: two lists: solution, close cover
-    def runQM(self, input):
-
-        #  format program input into function inputs
+    # parseInput(self, input) 
+    # turns an input string into the inputs of the minimization methods
+    # Arguments: a string input, e.g. m(1,2,3)+d(5,7)
+    # Returns: the list of minterms, the list of dont cares, and the number of variables
+    def parseInput(self, input):
         minterms, dontCares = self.formatInput(input)
         minterms = [int(x) for x in minterms.split(",")]
-        
-        if dontCares:
-            dontCares = [int(x) for x in dontCares.split(",")]
-            all = minterms + dontCares
-        else:
-            all = minterms
+        dontCares = [int(x) for x in dontCares.split(",")] if dontCares else []
 
-        all.sort()
-        
         # get num of bits for algorithm
-        numVariables = self.getNumVars(all)
-        
-        # maxterms for POS form
-        maxterms = []
+        numVariables = self.getNumVars(minterms + dontCares)
+
+        return minterms, dontCares, numVariables
+
+
+    # offSet(self, mintermsList, dontCaresList, numVariables) 
+    # finds the terms that are neither minterms nor dont cares
+    # Arguments: integer lists of minterms and dont cares, and the number of variables
+    # Returns: a sorted list of the OFF set terms (maxterms)
+    def offSet(self, mintermsList, dontCaresList, numVariables):
+        off = np.ones(2**numVariables, dtype=bool)
+        off[list(mintermsList)] = False
+        off[list(dontCaresList)] = False
+
+        return np.flatnonzero(off).tolist()
+
+
+    # solve(self, input, pos, parallel) 
+    # minimizes a function without any console output
+    # Arguments: string input, whether to compute the POS form as well, and whether to minimize the SOP and POS
+    # forms at the same time in two worker processes
+    # Returns: a QMResult
+    def solve(self, input, pos=False, parallel=False):
+        minterms, dontCares, numVariables = self.parseInput(input)
+        all = sorted(minterms + dontCares)
+
+        # the SOP form covers the minterms, and the POS form covers the OFF set, with the same dont cares
+        forms = [False, True] if pos else [False]
+
+        if parallel and pos:
+            with multiprocessing.Pool(len(forms), initializer=initWorker, initargs=(self.options,)) as pool:
+                jobs = [pool.apply_async(minimizeForm, (minterms, dontCares, all, numVariables, form))
+                        for form in forms]
+                outputs = [job.get() for job in jobs]
+
+            self.numVariables = numVariables
+            self.varLetters = self.getVarNames(numVariables)
+        else:
+            outputs = []
+            for form in forms:
+                solution, closeCover = self.minimize(minterms, dontCares, all, numVariables, form)
+                stats = self.stats.toDict() if self.stats is not None else None
+                outputs.append((solution, closeCover, self.isMinimal, stats))
+
+        solution, closeCover, isMinimal, stats = outputs[0]
+        sop = self.formatSolutions(solution, closeCover, "SOP")
+
+        # cost of the first option
+        terms = solution + (closeCover[0].split(" + ") if closeCover else [])
+        cost = sum(len(self.groupLiterals(term)) for term in terms)
+
+        result = QMResult(input, numVariables, solution, closeCover, sop, cost, isMinimal)
+        result.stats = stats
 
-        # find maxterms from minterms
-        for i in range(2**(numVariables)):
-            if (i not in minterms):
-                maxterms.append(i)
+        if pos:
+            result.posSolution, result.posCloseCover, result.posIsMinimal, result.posStats = outputs[1]
+            result.pos = self.formatSolutions(result.posSolution, result.posCloseCover, "POS")
+            result.posClauses = self.maxtermCover(result.posSolution, result.posCloseCover)
+
+            # the cheaper of the two forms
+            result.posCost = sum(len(clause) for clause in result.posClauses[0]) if result.posClauses else 0
+            result.best = "POS" if result.posCost < result.cost else "SOP"
+
+        return result
+
+
+    # runQM(self, input, parallel) 
+    # runs QM method and prints the SOP and POS forms
+    # Arguments: string input into program, and whether to minimize both forms at the same time
+    # Returns: two lists: solution, close cover
+    def runQM(self, input, parallel=False):
+        result = self.solve(input, pos=True, parallel=parallel)
 
         # print program output
         print("Solution for: " + input)
         print("=========================")
         print("=========================")
         print("SOP form:")            
-        solution, closeCover = self.qmMethod(minterms, dontCares, all, numVariables)
-        self.printAllSolutions(solution, closeCover, "SOP")
+        self.printAllSolutions(result.solution, result.closeCover, "SOP", result.isMinimal)
         print("POS form:")   
-        solution, closeCover = self.qmMethod(maxterms, dontCares, maxterms, numVariables)
-        self.printAllSolutions(solution, closeCover, "POS")
+        self.printAllSolutions(result.posSolution, result.posCloseCover, "POS", result.posIsMinimal)
         print("=========================")
 
-        solution, closeCover = self.qmMethod(minterms, dontCares, all, numVariables)
-        # if solution:
-        #     solution = solution.sort()
-        # if closeCover:
-        #     closeCover = closeCover.sort()
-        return solution, closeCover
+        return result.solution, result.closeCover
+
+    # runMultiQM(self, inputs) 
+    # runs the multi-output QM method on several functions of the same inputs
+    # Arguments: a list of string inputs, one per output
+    # Returns: a list of solutions, one per output
+    def runMultiQM(self, inputs):
+        mintermsLists = []
+        dontCaresLists = []
+
+        #  format program inputs into function inputs
+        for eq in inputs:
+            minterms, dontCares, numVariables = self.parseInput(eq)
+            mintermsLists.append(minterms)
+            dontCaresLists.append(dontCares)
+
+        # all outputs use the same variables
+        numVariables = self.getNumVars(sum(mintermsLists, []) + sum(dontCaresLists, []))
+
+        solutions = self.multiOutputMethod(mintermsLists, dontCaresLists, numVariables)
+
+        # print program output
+        terms = set(term for solution in solutions for term in solution)
+        print("Multi-output solution (" + str(len(terms)) + " distinct products):")
+        print("=========================")
+        for k, solution in enumerate(solutions):
+            print("F" + str(k) + " = " + (self.printSolution(solution) if solution else "0"))
+        print("=========================")
+
+        return solutions
+
+
+# mergeChunk(chunk) 
+# merges a chunk of a level of cubes for QMClass.mergeLevelParallel. This runs in its worker processes. Every
+# MERGE_STEP cubes, the worker writes how many cubes it has combined into its slot of the counter, and stops
+# early if the chunks together have combined more than the budget.
+# Arguments: a tuple of the shared memory name, the name of the shared counter, the index of the chunk, the number
+# of cubes in the shared memory (sorted by mask), the range of cubes to merge, the number of bits, and the number
+# of combined cubes that fit in the memory limit (None without a limit)
+# Returns: the combined cubes and the checked cubes, each as a 2 x N integer array of values and masks
+def mergeChunk(chunk):
+    name, counterName, index, length, start, end, numVariables, budget = chunk
+    shm = multiprocessing.shared_memory.SharedMemory(name=name)
+    counter = multiprocessing.shared_memory.SharedMemory(name=counterName)
+    qm = QMClass(cache=False)
+    combined = []
+    checklist = []
+
+    try:
+        cubes = np.ndarray((2, length), dtype=np.int64, buffer=shm.buf)
+        counts = np.ndarray(counter.size // 8, dtype=np.int64, buffer=counter.buf)
+
+        # each mask of the chunk, with its whole bucket to look neighbours up in
+        i = start
+        while i < end:
+            mask = int(cubes[1, i])
+            bucketStart = int(np.searchsorted(cubes[1], mask, side='left'))
+            bucketEnd = int(np.searchsorted(cubes[1], mask, side='right'))
+            values = set(cubes[0, bucketStart:bucketEnd].tolist())
+
+            while i < min(end, bucketEnd):
+                step = min(end, bucketEnd, i + MERGE_STEP)
+                qm.mergeBucket(mask, values, cubes[0, i:step].tolist(), numVariables, combined, checklist)
+                i = step
+
+                # the main process raises QMTooLargeError once it has the results
+                counts[index] = len(combined)
+                if budget is not None and counts.sum() > budget:
+                    i = end
+
+        del cubes, counts
+    finally:
+        shm.close()
+        counter.close()
+
+    return (np.array(combined, dtype=np.int64).reshape(-1, 2).T,
+            np.array(checklist, dtype=np.int64).reshape(-1, 2).T)
+
+
+# the QMClass of a worker process, built once by initWorker and used for every task the process runs
+workerQM = None
+
+
+# initWorker(options) 
+# builds the QMClass of a worker process, so its caches and its disk cache connection are shared by all the
+# tasks the process runs. This is the initializer of the pools of QMClass.solve and runBatch.
+# Arguments: a dictionary of QMClass options
+# Returns: None
+def initWorker(options):
+    global workerQM
+    workerQM = QMClass(**options)
+
+
+# minimizeForm(mintermsList, dontCaresList, allList, numVariables, pos) 
+# minimizes one form of a function. This runs in the worker processes of QMClass.solve.
+# Arguments: integer lists of minterms, dont cares and all inputs, the number of bits, and whether to minimize
+# the OFF set (the POS form)
+# Returns: the solution, the close cover, whether it is minimal, and the stats dictionary (None without stats)
+def minimizeForm(mintermsList, dontCaresList, allList, numVariables, pos=False):
+    qm = workerQM
+    solution, closeCover = qm.minimize(mintermsList, dontCaresList, allList, numVariables, pos)
+
+    return solution, closeCover, qm.isMinimal, qm.stats.toDict() if qm.stats is not None else None
+
+
+# solveLine(eq) 
+# minimizes one line of a batch file with the QMClass of the process. This runs in the worker processes of
+# runBatch.
+# Arguments: the input string
+# Returns: a line of output: the input, a tab, and the SOP solution (close cover options joined by " | ")
+def solveLine(eq):
+    try:
+        sop = workerQM.solve(eq).sop
+
+        # no terms is the constant 0, and an empty term is the constant 1
+        result = " | ".join(term or "1" for term in sop) if sop else "0"
+    except ValueError as e:
+        result = "error: " + str(e)
+
+    return eq + "\t" + result
+
+
+# runBatch(filename, jobs, outFile, options) 
+# minimizes every line of a file in a pool of processes, and writes the results in input order
+# Arguments: the input filename, the number of processes, the file object to write to, and a dictionary of
+# QMClass options
+# Returns: None
+def runBatch(filename, jobs, outFile, options):
+    with open(filename, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    if jobs <= 1:
+        initWorker(options)
+        for result in map(solveLine, lines):
+            outFile.write(result + "\n")
+        return
+
+    # imap keeps the input order, and lets results be written while later lines are still running
+    with multiprocessing.Pool(jobs, initializer=initWorker, initargs=(options,)) as pool:
+        for result in pool.imap(solveLine, lines, chunksize=max(1, len(lines) // (jobs * 16))):
+            outFile.write(result + "\n")
+
+
+# streamLines(inFile, outFile, options) 
+# minimizes one function per line of inFile as the lines arrive, and writes one JSON line per result.
+# A line is either an m(...)+d(...) string or a JSON object {"minterms": [...], "dontCares": [...]}
+# with an optional "id" that is copied to the output. Only one line is held in memory at a time.
+# Arguments: the input and output file objects, and a dictionary of QMClass options
+# Returns: None
+def streamLines(inFile, outFile, options):
+    qm = QMClass(**options)
+
+    for line in inFile:
+        line = line.strip()
+        if not line:
+            continue
+
+        output = {}
+        try:
+            if line.startswith("{"):
+                request = json.loads(line)
+                if "id" in request:
+                    output["id"] = request["id"]
+                eq = "m(" + ",".join(str(x) for x in request["minterms"]) + ")"
+                if request.get("dontCares"):
+                    eq += "+d(" + ",".join(str(x) for x in request["dontCares"]) + ")"
+            else:
+                eq = line
+
+            output.update(qm.solve(eq).toDict())
+        except (ValueError, KeyError, TypeError) as e:
+            output["input"] = line
+            output["error"] = str(e)
+
+        outFile.write(json.dumps(output) + "\n")
+        outFile.flush()
+
+
+# parseArgs(args) 
+# parses the command line arguments for the non-interactive modes
+# Arguments: a list of command line arguments
+# Returns: the parsed arguments
+def parseArgs(args):
+    parser = argparse.ArgumentParser(description="Quine-McCluskey boolean function minimizer")
+    parser.add_argument("--batch", metavar="FILE", help="minimize every m(...)+d(...) line of FILE")
+    parser.add_argument("--stream", action="store_true", help="read functions from stdin and write JSON lines")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--output", metavar="FILE", help="write results to FILE instead of stdout")
+    parser.add_argument("--solver", choices=["petrick", "branch"], default="petrick")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per function for the close cover")
+    parser.add_argument("--heuristic", action="store_true", help="use the espresso heuristic")
+    parser.add_argument("--cache", metavar="FILE", default=None, help="store minimized functions in an SQLite file")
+    parser.add_argument("--stats", action="store_true", help="add phase times and counters to --stream output")
+    parser.add_argument("--memory-limit", type=float, default=None, metavar="MB",
+                        help="memory limit of the exact method per function")
+    parser.add_argument("--merge-jobs", type=int, default=1, metavar="N",
+                        help="processes for merging large cube levels (--stream only, batch workers run one each)")
+    parser.add_argument("--too-large", choices=["espresso", "error"], default="espresso",
+                        help="what to do when a function is over the memory limit")
+    parsed = parser.parse_args(args)
+    if not parsed.batch and not parsed.stream:
+        parser.error("one of --batch or --stream is required")
+    return parsed
 
 
 def main():
 
+        # non-interactive modes
+        if len(sys.argv) > 1:
+            args = parseArgs(sys.argv[1:])
+            options = {"solver": args.solver, "timeLimit": args.time_limit, "heuristic": args.heuristic,
+                       "cachePath": args.cache, "stats": args.stats, "onTooLarge": args.too_large,
+                       "memoryLimit": int(args.memory_limit * 2**20) if args.memory_limit else None,
+                       "mergeJobs": args.merge_jobs}
+
+            if args.batch:
+                outFile = open(args.output, 'w') if args.output else sys.stdout
+                runBatch(args.batch, args.jobs, outFile, options)
+                if args.output:
+                    outFile.close()
+            elif args.stream:
+                streamLines(sys.stdin, sys.stdout, options)
+            return
+
         mode = input("Read from file? [yes/no]: ")
         qm = QMClass()
 
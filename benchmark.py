@@ -0,0 +1,168 @@
+########################################################
+#  Benchmark Script
+#  Description: This Script times the QM class on seeded random functions and on known hard cyclic functions.
+#  For every function it reports the time (and optionally the peak memory) of each qmMethod phase, and the
+#  end to end time of runQM and of building the circuit schematic.
+#  USAGE: benchmark.py [--vars 4,8,12] [--densities 0.1,0.3] [--dc 0,0.1] [--memory] [--json FILE]
+########################################################
+
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+import tracemalloc
+import QM
+
+# the schematic is only timed if schemdraw is installed
+try:
+    import circuit
+except ImportError:
+    circuit = None
+
+
+# randomFunction(rng, numVariables, density, dcDensity)
+# generates a random function
+# Arguments: a random.Random instance, the number of variables, the fraction of terms that are minterms, and the
+# fraction of the remaining terms that are dont cares
+# Returns: two sorted lists: minterms, dont cares
+def randomFunction(rng, numVariables, density, dcDensity):
+    terms = list(range(2**numVariables))
+    rng.shuffle(terms)
+
+    numOn = max(1, int(density * len(terms)))
+    numDC = int(dcDensity * (len(terms) - numOn))
+
+    return sorted(terms[:numOn]), sorted(terms[numOn:numOn + numDC])
+
+
+# cyclicFunctions()
+# lists functions known to have a cyclic PI chart (no essential primes). "notAllEqual" is 1 unless every input
+# is equal: its primes are the pairs XY', and its cheapest covers are the cycles through all variables, so the
+# number of close cover options grows quickly with the number of variables.
+# Arguments: None
+# Returns: a list of (name, number of variables, minterms, dont cares)
+def cyclicFunctions():
+    cases = [("cyclic3", 3, [0, 1, 2, 5, 6, 7], [])]
+
+    for n in range(3, 9):
+        cases.append(("notAllEqual" + str(n), n, list(range(1, 2**n - 1)), []))
+
+    return cases
+
+
+# runCase(name, numVariables, minterms, dontCares, args)
+# benchmarks one function
+# Arguments: the name of the case, the number of variables, the lists of minterms and dont cares, and the
+# parsed command line arguments
+# Returns: a dictionary with the results
+def runCase(name, numVariables, minterms, dontCares, args):
+    options = {"solver": args.solver, "timeLimit": args.time_limit, "cache": False, "table": False}
+    qm = QM.QMClass(stats=True, **options)
+
+    if args.memory:
+        tracemalloc.start()
+    solution, closeCover = qm.minimize(minterms, dontCares, minterms + dontCares, numVariables)
+    if args.memory:
+        tracemalloc.stop()
+
+    stats = qm.stats.toDict()
+    row = {"name": name, "numVariables": numVariables, "minterms": len(minterms), "dontCares": len(dontCares),
+           "isMinimal": qm.isMinimal, "options": max(1, len(closeCover)), "stats": stats}
+
+    # end to end, SOP and POS as printed by runQM
+    eq = "m(" + ",".join(str(x) for x in minterms) + ")"
+    if dontCares:
+        eq += "+d(" + ",".join(str(x) for x in dontCares) + ")"
+
+    if numVariables <= args.end_to_end:
+        algo = QM.QMClass(**options)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sol, close = algo.runQM(eq)
+        row["runQM"] = time.perf_counter() - start
+
+        if circuit is not None and not args.no_circuit:
+            start = time.perf_counter()
+            circuit.buildDrawing(sol, close, algo)
+            row["circuit"] = time.perf_counter() - start
+
+    return row
+
+
+# formatRow(row)
+# formats the results of one case as a line of the report
+# Arguments: a dictionary from runCase
+# Returns: a string
+def formatRow(row):
+    times = row["stats"]["times"]
+    counters = row["stats"]["counters"]
+    core = counters.get("cyclicCore", [0, 0])
+
+    line = "%-16s %3d %7d %6d %6d %9s %7.1f" % (row["name"], row["numVariables"], row["minterms"],
+                                                row["dontCares"], counters.get("primeImplicants", 0),
+                                                "%dx%d" % tuple(core), times["total"] * 1000)
+
+    # the slowest phases
+    phases = sorted((t, p) for p, t in times.items() if p != "total")[::-1][:3]
+    line += "  " + ", ".join("%s %.1f" % (p, t * 1000) for t, p in phases)
+
+    if "memory" in row["stats"]:
+        line += "  peak %.0f KB" % (row["stats"]["memory"]["total"] / 1024)
+    if "runQM" in row:
+        line += "  runQM %.1f" % (row["runQM"] * 1000)
+    if "circuit" in row:
+        line += "  circuit %.1f" % (row["circuit"] * 1000)
+    if not row["isMinimal"]:
+        line += "  (time limit)"
+
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quine-McCluskey benchmarks")
+    parser.add_argument("--vars", default="4,6,8,10,12,14,16", help="comma separated numbers of variables")
+    parser.add_argument("--densities", default="0.01,0.1,0.3", help="fractions of terms that are minterms")
+    parser.add_argument("--dc", default="0,0.1", help="fractions of the other terms that are dont cares")
+    parser.add_argument("--repeat", type=int, default=1, help="random functions per setting")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solver", choices=["petrick", "branch"], default="petrick")
+    parser.add_argument("--time-limit", type=float, default=2.0, help="seconds per close cover")
+    parser.add_argument("--end-to-end", type=int, default=12, metavar="N",
+                        help="also time runQM and the schematic for up to N variables")
+    parser.add_argument("--no-circuit", action="store_true", help="don't time the schematic")
+    parser.add_argument("--no-cyclic", action="store_true", help="skip the cyclic functions")
+    parser.add_argument("--memory", action="store_true", help="trace peak memory per phase (slower)")
+    parser.add_argument("--json", metavar="FILE", help="write all results to FILE as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = []
+    for n in [int(x) for x in args.vars.split(",")]:
+        for density in [float(x) for x in args.densities.split(",")]:
+            for dcDensity in [float(x) for x in args.dc.split(",")]:
+                for k in range(args.repeat):
+                    minterms, dontCares = randomFunction(rng, n, density, dcDensity)
+                    cases.append(("random-%g-%g" % (density, dcDensity), n, minterms, dontCares))
+
+    if not args.no_cyclic:
+        cases += cyclicFunctions()
+
+    print("times in ms" + ("" if circuit is not None else ", schemdraw is not installed so the schematic is not timed"))
+    print("%-16s %3s %7s %6s %6s %9s %7s  %s" % ("case", "n", "on", "dc", "PIs", "core", "total", "slowest phases"))
+
+    rows = []
+    for name, n, minterms, dontCares in cases:
+        row = runCase(name, n, minterms, dontCares, args)
+        rows.append(row)
+        print(formatRow(row), flush=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
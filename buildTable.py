@@ -0,0 +1,61 @@
+########################################################
+#  Cover Table Build Script
+#  Description: This Script runs the QM class on every completely specified function of 4 variables and
+#  stores the results in table4.npz, which QMClass.tableMethod uses to answer small functions with a
+#  single lookup. Run it again whenever the minimization output changes.
+########################################################
+
+
+import numpy as np
+import multiprocessing
+import os
+import sys
+import QM
+
+
+# encodeFunction(truthTable)
+# minimizes one 4 variable function and encodes the result as bytes. Every cube is one byte, with the value
+# in the low 4 bits and the mask in the high 4 bits. The bytes are: the number of essential terms, the
+# essential cubes, the number of close cover options, then for each option its length and its cubes.
+# Arguments: the truth table as an integer (bit x is the output for minterm x)
+# Returns: the literal cost of the first cover, and the encoded bytes
+def encodeFunction(truthTable):
+    qm = QM.QMClass(cache=False, table=False)
+    minterms = [x for x in range(16) if (truthTable >> x) & 1]
+    solution, closeCover = qm.qmMethod(minterms, [], minterms, 4) if minterms else ([], [])
+
+    essential = [qm.termToCube(term) for term in solution]
+    options = [[qm.termToCube(term) for term in option.split(" + ")] for option in closeCover]
+
+    def encode(cubes):
+        return [len(cubes)] + [value | (mask << 4) for value, mask in cubes]
+
+    data = encode(essential) + [len(options)]
+    for option in options:
+        data += encode(option)
+
+    cubes = essential + (options[0] if options else [])
+    cost = sum(qm.cubeCost(cube) for cube in cubes)
+
+    return cost, bytes(data)
+
+
+def main():
+    # output file, next to QM.py by default
+    args = sys.argv
+    path = args[1] if len(args) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), QM.TABLE_FILE)
+
+    with multiprocessing.Pool() as pool:
+        results = pool.map(encodeFunction, range(2**16), chunksize=256)
+
+    costs = np.array([cost for cost, data in results], dtype=np.uint8)
+    offsets = np.zeros(2**16 + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(data) for cost, data in results])
+    data = np.frombuffer(b"".join(data for cost, data in results), dtype=np.uint8)
+
+    np.savez_compressed(path, costs=costs, offsets=offsets, data=data)
+    print("wrote " + str(len(results)) + " functions (" + str(len(data)) + " bytes of covers) to " + path)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,16 +13,17 @@ import schemdraw
 from schemdraw.parsing import logicparse
 import schemdraw.elements as elm
 import QM
+import os
 import sys
 
 # generateEquations(solutions, closeCover) 
 # generates boolean equations to draw as schematics
-# Arguments: a list containing QM solution terms, and a list containing QM close cover terms
+# Arguments: a list containing QM solution terms, and a list containing QM close cover options
 # Returns: None
 def generateEquations(solutions, closeCover):
     
     if closeCover:
-        return [solutions + [i] for i in closeCover]
+        return [solutions + i.split(" + ") for i in closeCover]
     
     return [solutions]
 
@@ -33,23 +34,18 @@ def generateEquations(solutions, closeCover):
 # Returns: None   
 def formatLiterals(literals):
     for i, lit in enumerate(literals):
-            if len(lit) == 2:
-                literals[i] = "$\\overline{" + lit[0]  + "}" + "$"
+            if lit.endswith("'"):
+                literals[i] = "$\\overline{" + lit[:-1]  + "}" + "$"
 
 
-# generateLiterals(term) 
+# generateLiterals(term, algo) 
 # splits formatted literals into their own index in a list 
-# Arguments: a string of a solution term
+# Arguments: a string of a solution term, and the QM class instance that produced it (for its variable names)
 # Returns: a list of literals from the term
-def generateLiterals(term):
-    lits = []
+def generateLiterals(term, algo):
 
     # group literals
-    for i, literal in enumerate(term):
-        if literal == "'":
-            lits[-1] += "'"
-            continue
-        lits.append(literal)
+    lits = algo.groupLiterals(term)
     
     formatLiterals(lits)
     return lits
@@ -361,19 +357,11 @@ def connectRemaining(orGates, wires, totalAndGates, drawing):
 
 
 
-def main():
-    # commad line arguments
-    args = sys.argv
-
-    if len(args)==1:
-        print("USAGE: circuit.py terms [fileName]")
-        return
-
-    # create instance of QM class
-    algo = QM.QMClass()
-
-    # run the algorithm
-    sol, close = algo.runQM(args[1])
+# buildDrawing(sol, close, algo) 
+# builds the schematic of the first solution, without drawing it
+# Arguments: the QM solution terms and close cover options, and the QM class instance that produced them
+# Returns: the schemdraw drawing
+def buildDrawing(sol, close, algo):
 
     # sort the solution list for alphabetical ordered solution
     sol.sort()
@@ -396,7 +384,7 @@ def main():
 
     # for every term in the equation, generate and gates and wires
     for t in eq:
-        lit = generateLiterals(t)
+        lit = generateLiterals(t, algo)
                 
         buildAndGates(lit, totalAndGates, drawing)
         buildWires(lit, wires, totalAndGates ,drawing)
@@ -407,6 +395,27 @@ def main():
     
     # add finals labels to drawing
     addLabels(drawing, orGates, totalAndGates, wires, sol, close)
+
+    return drawing
+
+
+def main():
+    # commad line arguments
+    args = sys.argv
+
+    if len(args)==1:
+        print("USAGE: circuit.py terms [fileName]")
+        return
+
+    # create instance of QM class
+    # QM_CACHE can name an SQLite file that keeps minimized functions between runs
+    algo = QM.QMClass(cachePath=os.environ.get("QM_CACHE"))
+
+    # run the algorithm
+    sol, close = algo.runQM(args[1])
+
+    # build the schematic
+    drawing = buildDrawing(sol, close, algo)
     
     # create drawing
     drawing.draw()